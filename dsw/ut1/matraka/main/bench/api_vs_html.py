@@ -0,0 +1,99 @@
+"""JSON API list vs the HTML list page, same pages and page size.
+
+    python -m bench.api_vs_html --size 100000 --page-size 20 --requests 2000
+
+Runs in-process against a copy of a ``bench.seed`` dataset with the page
+cache disabled (``DummyCache``), so every request queries and renders or
+serializes its page. Cursors are random ids, the same sequence for every
+variant.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.seed import dataset_path, ensure_datasets, use_database
+from bench.stats import percentile
+
+VARIANTS = {
+    'html': '/posts/?{query}',
+    'api': '/posts/api/?{query}',
+    'api-sparse': '/posts/api/?{query}&fields=title,slug',
+}
+
+
+def run(urls: list[str]) -> dict:
+    from bench.drivers import call_wsgi
+    from main.wsgi import application
+
+    latencies, sizes, errors = [], [], 0
+    started = time.perf_counter()
+    for url in urls:
+        began = time.perf_counter()
+        status, _, body = call_wsgi(application, 'GET', url)
+        latencies.append(time.perf_counter() - began)
+        sizes.append(len(body))
+        errors += status >= 400
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(urls),
+        'errors': errors,
+        'rps': round(len(urls) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'bytes_mean': round(statistics.mean(sizes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='Dataset size')
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    ensure_datasets([args.size], args.seed)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+    import django
+    from django.conf import settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / 'bench.sqlite3'
+        shutil.copyfile(dataset_path(args.size), database)
+        use_database(database)
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['localhost']
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        django.setup()
+
+        from posts.pagination import encode_cursor
+
+        rng = random.Random(args.seed)
+        queries = [
+            f'size={args.page_size}&cursor={encode_cursor((rng.randint(1, args.size),), "next")}'
+            for _ in range(args.warmup + args.requests)
+        ]
+        results = {}
+        for name, pattern in VARIANTS.items():
+            urls = [pattern.format(query=query) for query in queries]
+            run(urls[: args.warmup])
+            results[name] = run(urls[args.warmup :])
+            stats = results[name]
+            print(
+                f'{name:<11} {stats["rps"]:>8} req/s  p50={stats["p50_ms"]}ms  p95={stats["p95_ms"]}ms  '
+                f'{stats["bytes_mean"]} bytes/response  errors={stats["errors"]}'
+            )
+    print(json.dumps({'size': args.size, 'page_size': args.page_size, 'variants': results}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""ASGI (async views) vs WSGI (sync views) with many concurrent slow clients.
+
+Each mode runs in its own process, with its own settings module, against a
+fresh copy of a ``bench.seed`` dataset:
+
+    python -m bench.asgi_vs_wsgi --clients 200 --requests 2000 --client-delay 0.05
+
+The WSGI side models a threaded sync server (``--threads`` workers, like
+``gunicorn --threads``): a slow client holds a thread for its whole request.
+The ASGI side runs every client as a coroutine on a single event loop, with
+the sync code of all of them on ``ASGI_THREADS`` threads (``shared.asgi``).
+
+Both sides run the production profile (``main.settings_production`` and
+``main.settings_asgi``, built on it), with its caches in a temporary
+directory, so they differ only in the server side.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from bench.seed import collect_static, dataset_path, ensure_datasets, production_env, use_database
+from bench.stats import percentile
+
+SETTINGS = {'wsgi': 'main.settings_production', 'asgi': 'main.settings_asgi'}
+
+
+def build_urls(count: int) -> list[str]:
+    from posts.models import Post
+
+    slugs = list(Post.objects.order_by('id').values_list('slug', flat=True)[:50])
+    urls = ['/posts/'] + [f'/posts/{slug}/' for slug in slugs]
+    return [urls[i % len(urls)] for i in range(count)]
+
+
+def run_wsgi(urls: list[str], threads: int, client_delay: float) -> tuple[list[float], int]:
+    from bench.drivers import call_wsgi
+    from main.wsgi import application
+
+    latencies, errors, peak = [], 0, 0
+
+    def one(url):
+        nonlocal peak
+        peak = max(peak, threading.active_count())
+        started = time.perf_counter()
+        status, _, _ = call_wsgi(application, 'GET', url, client_delay=client_delay)
+        return time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for latency, status in pool.map(one, urls):
+            latencies.append(latency)
+            errors += status >= 400
+    return latencies, errors, peak
+
+
+def run_asgi(urls: list[str], clients: int, client_delay: float) -> tuple[list[float], int]:
+    from bench.drivers import call_asgi
+    from main.asgi import application
+
+    latencies, errors, peak = [], 0, 0
+    limit = asyncio.Semaphore(clients)
+
+    async def one(url):
+        nonlocal errors, peak
+        async with limit:
+            peak = max(peak, threading.active_count())
+            started = time.perf_counter()
+            status, _, _ = await call_asgi(application, 'GET', url, client_delay=client_delay)
+            latencies.append(time.perf_counter() - started)
+            errors += status >= 400
+
+    async def main():
+        await asyncio.gather(*(one(url) for url in urls))
+
+    asyncio.run(main())
+    return latencies, errors, peak
+
+
+def worker(args):
+    import django
+
+    use_database(args.database)
+    django.setup()
+    collect_static(args.database.parent / 'static')
+    urls = build_urls(args.requests)
+    started = time.perf_counter()
+    if args.mode == 'wsgi':
+        # A sync server can't serve more clients at once than it has threads
+        latencies, errors, peak = run_wsgi(urls, args.threads, args.client_delay)
+    else:
+        latencies, errors, peak = run_asgi(urls, args.clients, args.client_delay)
+    elapsed = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                'mode': args.mode,
+                'requests': len(urls),
+                'errors': errors,
+                'seconds': round(elapsed, 3),
+                'rps': round(len(urls) / elapsed, 1),
+                'p50_ms': round(statistics.median(latencies) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+                'peak_threads': peak,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=100, help='Concurrent clients')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--client-delay', type=float, default=0.05, help='Seconds each client takes to send')
+    parser.add_argument('--size', type=int, default=1000, help='Posts in the dataset')
+    parser.add_argument('--mode', choices=SETTINGS, help=argparse.SUPPRESS)
+    parser.add_argument('--database', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return worker(args)
+
+    ensure_datasets([args.size])
+    for mode, settings_module in SETTINGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / 'bench.sqlite3'
+            shutil.copyfile(dataset_path(args.size), database)
+            env = {**os.environ, **production_env(Path(tmp)), 'DJANGO_SETTINGS_MODULE': settings_module}
+            cmd = [sys.executable, '-m', 'bench.asgi_vs_wsgi', '--mode', mode, '--database', str(database)]
+            cmd += ['--requests', str(args.requests), '--clients', str(args.clients)]
+            cmd += ['--threads', str(args.threads), '--client-delay', str(args.client_delay)]
+            out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(
+            f'{mode}: {result["rps"]:>8} req/s  p50={result["p50_ms"]}ms  p95={result["p95_ms"]}ms  '
+            f'p99={result["p99_ms"]}ms  errors={result["errors"]}  peak threads={result["peak_threads"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
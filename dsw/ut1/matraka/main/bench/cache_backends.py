@@ -0,0 +1,181 @@
+"""Cache backends under several worker processes: locmem, FileBasedCache,
+DatabaseCache and shared.cache.SQLiteCache.
+
+    python -m bench.cache_backends --processes 4 --seconds 5 --keys 10000 --max-entries 5000
+
+Every process plays a web worker doing cache-aside reads: ``get`` a key
+(popular keys more often, Zipf distribution), ``set`` it on a miss, and
+``set`` a random key every ``--write-every`` operations (an invalidation).
+All backends get the same ``MAX_ENTRIES``. Reported per backend: operations
+per second over all processes, hit ratio, latency percentiles and how much
+is stored (locmem: the sum of every process' own copy).
+
+DatabaseCache gets its own SQLite file with the production pragmas (WAL,
+busy timeout), as it would share the project database otherwise.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.stats import percentile
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+    'sqlite': 'shared.cache.SQLiteCache',
+}
+
+
+def configure(backend: str, tmp: Path, max_entries: int):
+    import django
+    from django.conf import settings
+
+    locations = {
+        'locmem': 'bench',
+        'filebased': str(tmp / 'filebased'),
+        'database': 'bench_cache',
+        'sqlite': str(tmp / 'cache.sqlite3'),
+    }
+    settings.configure(
+        CACHES={
+            'default': {
+                'BACKEND': BACKENDS[backend],
+                'LOCATION': locations[backend],
+                'TIMEOUT': None,
+                'OPTIONS': {'MAX_ENTRIES': max_entries},
+            }
+        },
+        DATABASES={
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': tmp / 'database.sqlite3',
+                'OPTIONS': {
+                    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL',
+                    'transaction_mode': 'IMMEDIATE',
+                    'timeout': 5,
+                },
+            }
+        },
+        INSTALLED_APPS=[],
+        USE_TZ=True,
+    )
+    django.setup()
+
+
+def worker(backend: str, tmp: Path, args, seed: int, barrier, results):
+    configure(backend, tmp, args.max_entries)
+    from django.core.cache import cache
+
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) ** args.zipf for rank in range(args.keys)))
+    # Incompressible, or FileBasedCache (zlib) would store next to nothing
+    value = rng.randbytes(args.value_size)
+    latencies, hits, misses, errors = [], 0, 0, 0
+
+    barrier.wait()
+    stop = time.monotonic() + args.seconds
+    for op in itertools.count(1):
+        if time.monotonic() >= stop:
+            break
+        key = f'page:{rng.choices(range(args.keys), cum_weights=weights)[0]}'
+        started = time.perf_counter()
+        try:
+            if op % args.write_every == 0:
+                cache.set(f'page:{rng.randrange(args.keys)}', value)
+            elif cache.get(key) is not None:
+                hits += 1
+            else:
+                misses += 1
+                cache.set(key, value)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    # locmem lives in this process: count its pickled entries here
+    stored = sum(map(len, cache._cache.values())) if backend == 'locmem' else 0
+    results.put(dict(latencies=latencies, hits=hits, misses=misses, errors=errors, stored=stored))
+
+
+def storage_size(backend: str, tmp: Path) -> int:
+    files = {
+        'filebased': (tmp / 'filebased').glob('*'),
+        'database': tmp.glob('database.sqlite3*'),
+        'sqlite': tmp.glob('cache.sqlite3*'),
+    }
+    return sum(path.stat().st_size for path in files.get(backend, ()))
+
+
+def run(backend: str, args) -> dict:
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if backend == 'database':
+            setup = context.Process(target=create_cache_table, args=(tmp, args.max_entries))
+            setup.start()
+            setup.join()
+
+        barrier, results = context.Barrier(args.processes), context.Queue()
+        processes = [
+            context.Process(target=worker, args=(backend, tmp, args, args.seed + n, barrier, results))
+            for n in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        stored = sum(outcome['stored'] for outcome in outcomes) or storage_size(backend, tmp)
+
+    latencies = [latency for outcome in outcomes for latency in outcome['latencies']]
+    hits = sum(outcome['hits'] for outcome in outcomes)
+    misses = sum(outcome['misses'] for outcome in outcomes)
+    return {
+        'ops_per_s': round(len(latencies) / args.seconds),
+        'hit_ratio': round(hits / max(hits + misses, 1), 3),
+        'p50_us': round(statistics.median(latencies) * 1e6, 1),
+        'p99_us': round(percentile(latencies, 99) * 1e6, 1),
+        'errors': sum(outcome['errors'] for outcome in outcomes),
+        'stored_mb': round(stored / 2**20, 1),
+    }
+
+
+def create_cache_table(tmp: Path, max_entries: int):
+    configure('database', tmp, max_entries)
+    from django.core.management import call_command
+
+    call_command('createcachetable', verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--keys', type=int, default=10_000, help='Distinct keys requested')
+    parser.add_argument('--max-entries', type=int, default=5_000)
+    parser.add_argument('--value-size', type=int, default=8_192, help='Bytes per value (a rendered page)')
+    parser.add_argument('--zipf', type=float, default=1.0, help='Skew of the key popularity')
+    parser.add_argument('--write-every', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backend', action='append', choices=BACKENDS, help='Default: all of them')
+    args = parser.parse_args()
+
+    summary = {}
+    for backend in args.backend or BACKENDS:
+        summary[backend] = r = run(backend, args)
+        print(
+            f'{backend:<10} {r["ops_per_s"]:>8} ops/s  hit ratio={r["hit_ratio"]:<6} '
+            f'p50={r["p50_us"]}us p99={r["p99_us"]}us  stored={r["stored_mb"]}MB  errors={r["errors"]}'
+        )
+    print(json.dumps({'processes': args.processes, 'keys': args.keys, 'backends': summary}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""In-process HTTP drivers: call ``main.wsgi`` / ``main.asgi`` applications
+directly with synthetic requests, no sockets or server involved."""
+
+import asyncio
+import io
+import time
+from urllib.parse import urlsplit
+
+HOST = 'localhost'
+
+
+def _split(url: str) -> tuple[str, str]:
+    parts = urlsplit(url)
+    return parts.path, parts.query
+
+
+def call_wsgi(app, method: str, url: str, body: bytes = b'', headers: dict | None = None, client_delay: float = 0):
+    """Run one request through a WSGI app and return ``(status, headers, body)``.
+
+    ``client_delay`` models a slow client: a sync server keeps its worker thread
+    blocked on the socket for that long before the app even starts.
+    """
+    if client_delay:
+        time.sleep(client_delay)
+    path, query = _split(url)
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in (headers or {}).items():
+        environ[f'HTTP_{name.upper().replace("-", "_")}'] = value
+    captured = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        captured['status'] = int(status.split()[0])
+        captured['headers'] = dict(response_headers)
+
+    result = app(environ, start_response)
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return captured['status'], captured['headers'], content
+
+
+async def call_asgi(app, method: str, url: str, body: bytes = b'', headers: dict | None = None, client_delay: float = 0):
+    """Run one request through an ASGI app and return ``(status, headers, body)``.
+
+    ``client_delay`` is spent inside ``receive()``, i.e. the request body trickles
+    in slowly, which only parks a coroutine.
+    """
+    path, query = _split(url)
+    raw_headers = [(b'host', HOST.encode())]
+    raw_headers += [(b'content-length', str(len(body)).encode())]
+    raw_headers += [(b'content-type', b'application/x-www-form-urlencoded')]
+    raw_headers += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': raw_headers,
+        'client': ('127.0.0.1', 50000),
+        'server': (HOST, 80),
+    }
+    delivered = False
+    response = {'headers': {}, 'body': []}
+
+    async def receive():
+        nonlocal delivered
+        if delivered:
+            # Nothing else to send: behave like a client that keeps the
+            # connection open until the response is out.
+            await asyncio.Future()
+        if client_delay:
+            await asyncio.sleep(client_delay)
+        delivered = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {k.decode(): v.decode() for k, v in message.get('headers', [])}
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return response['status'], response['headers'], b''.join(response['body'])
@@ -0,0 +1,189 @@
+"""Network-free load generator for the posts pages.
+
+Runs a deterministic mix of list / detail / add / edit requests against the
+WSGI or ASGI application in-process and prints one JSON line with latency
+percentiles, throughput and SQL queries per request for every endpoint.
+Normally driven by ``bench.suite``; can be run by hand as well:
+
+    DJANGO_SETTINGS_MODULE=main.settings python -m bench.loadgen \\
+        --entry wsgi --database bench/data/posts-1000-v2.sqlite3
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+from bench.stats import percentile
+
+# (endpoint, weight) of the request mix
+SCENARIO = (('post-list', 40), ('post-detail', 45), ('add-post', 5), ('edit-post', 10))
+CSRF_SECRET = 'benchbenchbenchbenchbenchbench42'
+CSRF_HEADERS = {'Cookie': f'csrftoken={CSRF_SECRET}', 'X-CSRFToken': CSRF_SECRET}
+
+_queries = contextvars.ContextVar('bench_queries', default=None)
+# What the posts views answer, with a 200, for a slug that doesn't exist
+MISSING_POST = b'does not exist!'
+
+
+def count_queries(execute, sql, params, many, context):
+    if (counter := _queries.get()) is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter():
+    from django.db.backends.signals import connection_created
+
+    def on_connection(sender, connection, **kwargs):
+        if count_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_queries)
+
+    connection_created.connect(on_connection, weak=False)
+
+
+def build_plan(requests: int, seed: int) -> list[tuple[str, str, str, bytes]]:
+    """Deterministic ``(endpoint, method, url, body)`` list over the current dataset."""
+    from posts.models import Post
+    from posts.pagination import encode_cursor
+
+    max_id = Post.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    rng = random.Random(seed)
+    endpoints, weights = zip(*SCENARIO)
+    plan = []
+    for n in range(requests):
+        endpoint = rng.choices(endpoints, weights)[0]
+        post_id = rng.randint(1, max(max_id, 1))
+        if endpoint == 'post-list':
+            # Pages anywhere in the table, not just the first one
+            query = {'cursor': encode_cursor((post_id,), 'next')} if rng.random() < 0.8 else {}
+            plan.append((endpoint, 'GET', f'/posts/?{urlencode(query)}', b''))
+        elif endpoint == 'post-detail':
+            plan.append((endpoint, 'GET', f'/posts/bench-post-{post_id}/', b''))
+        elif endpoint == 'add-post':
+            body = urlencode({'title': f'Bench new post {n}', 'content': 'lorem ipsum ' * 100})
+            plan.append((endpoint, 'POST', '/posts/add/', body.encode()))
+        else:
+            # The seeded title: an unchanged title keeps the slug, and the URL
+            # later requests use for this post
+            title = Post.objects.filter(pk=post_id).values_list('title', flat=True).get()
+            body = urlencode({'title': title, 'content': f'edited {n} ' * 100})
+            plan.append((endpoint, 'POST', f'/posts/bench-post-{post_id}/edit/', body.encode()))
+    return plan
+
+
+def outcome(status: int, body: bytes) -> int:
+    """The status, or 404 for a missing post, so it counts as an error."""
+    return 404 if status == 200 and body.endswith(MISSING_POST) else status
+
+
+def run_wsgi(plan, concurrency: int) -> list[tuple[str, float, int, int]]:
+    from bench.drivers import call_wsgi
+    from main.wsgi import application
+
+    def one(item):
+        endpoint, method, url, body = item
+        counter = [0]
+        token = _queries.set(counter)
+        try:
+            started = time.perf_counter()
+            status, _, content = call_wsgi(application, method, url, body, CSRF_HEADERS)
+            return endpoint, time.perf_counter() - started, outcome(status, content), counter[0]
+        finally:
+            _queries.reset(token)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, plan))
+
+
+def run_asgi(plan, concurrency: int) -> list[tuple[str, float, int, int]]:
+    from bench.drivers import call_asgi
+    from main.asgi import application
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(item):
+        endpoint, method, url, body = item
+        async with limit:
+            counter = [0]
+            _queries.set(counter)
+            started = time.perf_counter()
+            status, _, content = await call_asgi(application, method, url, body, CSRF_HEADERS)
+            return endpoint, time.perf_counter() - started, outcome(status, content), counter[0]
+
+    async def main():
+        # Each task gets its own copy of the context, so counters don't mix
+        return await asyncio.gather(*(one(item) for item in plan))
+
+    return asyncio.run(main())
+
+
+def summarize(samples, elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint in dict.fromkeys(name for name, *_ in samples):
+        rows = [s for s in samples if s[0] == endpoint]
+        latencies = [latency for _, latency, _, _ in rows]
+        queries = [count for *_, count in rows]
+        endpoints[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(status >= 400 for _, _, status, _ in rows),
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+        }
+    latencies = [latency for _, latency, _, _ in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(e['errors'] for e in endpoints.values()),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entry', choices=('wsgi', 'asgi'), required=True)
+    parser.add_argument('--database', type=Path, required=True, help='SQLite file to run against (modified!)')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=100, help='Unmeasured requests sent first')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    import django
+    from django.conf import settings
+
+    from bench.seed import collect_static, use_database
+
+    use_database(args.database)
+    # DEBUG keeps every query in memory and adds overhead to each request
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['localhost']
+    django.setup()
+    install_query_counter()
+
+    with tempfile.TemporaryDirectory() as static_root:
+        collect_static(Path(static_root))
+        run = run_wsgi if args.entry == 'wsgi' else run_asgi
+        plan = build_plan(args.warmup + args.requests, args.seed)
+        run(plan[: args.warmup], args.concurrency)
+        started = time.perf_counter()
+        samples = run(plan[args.warmup :], args.concurrency)
+    print(json.dumps(summarize(samples, time.perf_counter() - started)))
+
+
+if __name__ == '__main__':
+    main()
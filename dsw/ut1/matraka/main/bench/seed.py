@@ -0,0 +1,129 @@
+"""Deterministic benchmark datasets.
+
+    python -m bench.seed --size 1000 --size 100000 --size 1000000
+
+Each dataset is a migrated SQLite file under ``bench/data/`` holding exactly
+``size`` posts generated from a fixed random seed, so two runs on two machines
+measure the same data. Existing files are reused unless ``--force`` is given.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore '
+    'et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco laboris nisi '
+    'aliquip ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum '
+    'fugiat nulla pariatur excepteur sint occaecat cupidatat non proident sunt culpa qui officia '
+    'deserunt mollit anim id est laborum django sqlite matraka blog post'
+).split()
+BATCH_SIZE = 5000
+# Bump whenever a posts migration changes the schema: older files can't be used
+DATASET_VERSION = 2
+
+
+def dataset_path(size: int) -> Path:
+    return DATA_DIR / f'posts-{size}-v{DATASET_VERSION}.sqlite3'
+
+
+def use_database(path: Path):
+    """Point the default database at ``path``; call before ``django.setup()``."""
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+
+
+def collect_static(directory: Path):
+    """``collectstatic`` into ``directory``, after ``django.setup()``: the
+    production profile's manifest storage has no URL for a file without it."""
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.STATIC_ROOT = directory
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+
+def production_env(directory: Path) -> dict[str, str]:
+    """Environment for the settings built on ``main.settings_production``: a
+    throwaway key, and its SQLite caches in ``directory``, not the project's."""
+    return {
+        'SECRET_KEY': 'bench-only-secret-key',
+        'POSTS_CACHE_LOCATION': str(directory / 'cache.sqlite3'),
+        'SESSIONS_CACHE_LOCATION': str(directory / 'sessions.sqlite3'),
+    }
+
+
+def generate_posts(size: int, seed: int = 42):
+    """``(title, slug, content)`` for posts 1..size, always the same for a seed."""
+    rng = random.Random(seed)
+    for i in range(1, size + 1):
+        title = f'Post {i} ' + ' '.join(rng.choices(WORDS, k=rng.randint(2, 6)))
+        paragraphs = (' '.join(rng.choices(WORDS, k=rng.randint(40, 120))) for _ in range(rng.randint(1, 5)))
+        yield title, f'bench-post-{i}', '\n\n'.join(paragraphs)
+
+
+def build(size: int, seed: int):
+    """Migrate a scratch database, fill it and copy it to ``dataset_path(size)``."""
+    import django
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = Path(tmp) / 'seed.sqlite3'
+        use_database(scratch)
+        django.setup()
+
+        from django.core.management import call_command
+        from django.db import connection, transaction
+
+        from posts.models import Post, summarize
+
+        call_command('migrate', verbosity=0)
+        rows = generate_posts(size, seed)
+        while batch := [
+            Post(title=t, slug=s, content=c, **summarize(c)) for _, (t, s, c) in zip(range(BATCH_SIZE), rows)
+        ]:
+            with transaction.atomic():
+                Post.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        connection.close()
+
+        DATA_DIR.mkdir(exist_ok=True)
+        shutil.copyfile(scratch, dataset_path(size))
+
+
+def ensure_datasets(sizes, seed: int = 42, force: bool = False):
+    for size in sizes:
+        path = dataset_path(size)
+        if path.exists() and not force:
+            continue
+        started = time.perf_counter()
+        # One process per dataset: the database can only be chosen before setup
+        cmd = [sys.executable, '-m', 'bench.seed', '--build', str(size), '--seed', str(seed)]
+        subprocess.run(cmd, check=True, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'main.settings'})
+        print(f'{path}: {size} posts in {time.perf_counter() - started:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, action='append', help='Posts in the dataset (repeatable)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='Rebuild existing datasets')
+    parser.add_argument('--build', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.build:
+        build(args.build, args.seed)
+    else:
+        ensure_datasets(args.size or [1000], args.seed, args.force)
+
+
+if __name__ == '__main__':
+    main()
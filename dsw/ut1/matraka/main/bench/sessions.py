@@ -0,0 +1,179 @@
+"""Session cost per request, and purging expired sessions.
+
+    python -m bench.sessions --expired 200000 --live 20000
+
+Part 1 counts the queries each request makes on the project database (all,
+and those on django_session), after one warm-up request, under:
+
+- ``django-db``: Django's SessionMiddleware and database sessions (the old setup).
+- ``cached_db``: shared.middleware.SessionMiddleware, cached_db engine (main.settings).
+- ``cache``: the same middleware, sessions in a SQLiteCache file (main.settings_production).
+
+Part 2 fills django_session with expired and live rows and compares
+``clearsessions`` with ``purge_sessions``: total time and the longest single
+DELETE, which is how long other writers wait for the lock.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from bench.seed import dataset_path, ensure_datasets, use_database
+
+DJANGO_SESSIONS = 'django.contrib.sessions.middleware.SessionMiddleware'
+SHARED_SESSIONS = 'shared.middleware.SessionMiddleware'
+LOGIN = {'username': 'bench', 'password': 'bench-password'}
+
+
+def configs(tmp: Path) -> dict[str, dict]:
+    from django.conf import settings
+
+    return {
+        'django-db': dict(
+            MIDDLEWARE=[DJANGO_SESSIONS if name == SHARED_SESSIONS else name for name in settings.MIDDLEWARE],
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+        ),
+        'cached_db': dict(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'),
+        'cache': dict(
+            CACHES={
+                **settings.CACHES,
+                'sessions': {'BACKEND': 'shared.cache.SQLiteCache', 'LOCATION': str(tmp / 'sessions.sqlite3')},
+            },
+            SESSION_ENGINE='django.contrib.sessions.backends.cache',
+            SESSION_CACHE_ALIAS='sessions',
+        ),
+    }
+
+
+def count_queries(client, method: str, url: str, data=None) -> tuple[int, int]:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        getattr(client, method)(url, data or {})
+    sessions = sum('django_session' in query['sql'] for query in queries.captured_queries)
+    return len(queries), sessions
+
+
+def per_request(tmp: Path) -> dict:
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from posts.models import Post
+
+    slug = Post.objects.values_list('slug', flat=True).first()
+    User.objects.create_superuser(LOGIN['username'], 'bench@example.com', LOGIN['password'])
+    results = {}
+    for name, overrides in configs(tmp).items():
+        with override_settings(**overrides):
+            anonymous, signed_in = Client(), Client()
+            signed_in.post('/admin/login/', LOGIN)
+            scenarios = {
+                'GET /posts/ anonymous': (anonymous, 'get', '/posts/', {}),
+                'GET /posts/ signed in': (signed_in, 'get', '/posts/', {}),
+                'same, SAVE_EVERY_REQUEST': (signed_in, 'get', '/posts/', dict(SESSION_SAVE_EVERY_REQUEST=True)),
+                'GET /posts/<slug>/ signed in': (signed_in, 'get', f'/posts/{slug}/', {}),
+                'GET /posts/api/ signed in': (signed_in, 'get', '/posts/api/', {}),
+                'GET /admin/ signed in': (signed_in, 'get', '/admin/', {}),
+                'POST /admin/login/': (Client(), 'post', '/admin/login/', {}),
+            }
+            results[name] = {}
+            for scenario, (client, method, url, extra) in scenarios.items():
+                with override_settings(**extra):
+                    if method == 'get':
+                        count_queries(client, method, url)  # warm-up
+                        results[name][scenario] = count_queries(client, method, url)
+                    else:
+                        results[name][scenario] = count_queries(client, method, url, LOGIN)
+    return results
+
+
+def fill_sessions(expired: int, live: int):
+    from django.contrib.sessions.models import Session
+    from django.utils import timezone
+
+    now = timezone.now()
+    for count, delta in ((expired, -timedelta(days=1)), (live, timedelta(days=14))):
+        Session.objects.bulk_create(
+            [Session(session_key=f'{delta.days}-{n:032d}', session_data='', expire_date=now + delta)
+             for n in range(count)],
+            batch_size=5000,
+        )
+
+
+def purge(command: str, expired: int, live: int) -> dict:
+    from django.contrib.sessions.models import Session
+    from django.core.management import call_command
+    from django.db import connection
+
+    Session.objects.all().delete()
+    fill_sessions(expired, live)
+    deletes = []
+
+    def timed(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if sql.startswith('DELETE'):
+                deletes.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(timed):
+        if command == 'clearsessions':
+            call_command('clearsessions')
+        else:
+            call_command('purge_sessions', pause=0, stdout=open(os.devnull, 'w'))
+    elapsed = time.perf_counter() - started
+    assert Session.objects.count() == live
+    return {
+        'total_s': round(elapsed, 2),
+        'deletes': len(deletes),
+        'longest_delete_ms': round(max(deletes, default=0) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--expired', type=int, default=200_000)
+    parser.add_argument('--live', type=int, default=20_000)
+    parser.add_argument('--size', type=int, default=1000, help='Posts in the dataset')
+    args = parser.parse_args()
+
+    ensure_datasets([args.size])
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+    import django
+    from django.conf import settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        database = tmp / 'bench.sqlite3'
+        shutil.copyfile(dataset_path(args.size), database)
+        use_database(database)
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['testserver']
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        django.setup()
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+
+        queries = per_request(tmp)
+        print(f'{"queries (all / django_session)":<32}' + ''.join(f'{name:>14}' for name in queries))
+        for scenario in next(iter(queries.values())):
+            cells = ''.join(f'{"%d / %d" % queries[name][scenario]:>14}' for name in queries)
+            print(f'{scenario:<32}{cells}')
+
+        purges = {command: purge(command, args.expired, args.live) for command in ('clearsessions', 'purge_sessions')}
+        for command, r in purges.items():
+            print(f'{command:<15} {r["total_s"]}s  {r["deletes"]} DELETEs, longest {r["longest_delete_ms"]}ms')
+    print(json.dumps({'queries': queries, 'purge': purges}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Mixed read/write SQLite load: default settings vs the production profile.
+
+    python -m bench.sqlite_concurrency --readers 8 --writers 4 --seconds 5
+
+Every profile runs in its own process against a fresh, migrated copy of the
+schema (WAL is a persistent property of the file). Readers page through
+posts, writers create posts with ``save_with_unique_slug`` (slug lookup, then
+the INSERT, like add_post). Reported per profile: throughput,
+write latency (which is mostly time spent waiting for the lock) and how many
+operations failed with "database is locked".
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bench.stats import percentile
+
+PROFILES = {'default': 'main.settings', 'production': 'main.settings_production'}
+
+
+def setup_database(path: Path, seed: int):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.core.management import call_command
+    from posts.models import Post
+
+    call_command('migrate', verbosity=0)
+    Post.objects.bulk_create(
+        [Post(title=f'Seed {i}', slug=f'seed-{i}', content='lorem ipsum ' * 50) for i in range(seed)]
+    )
+
+
+def run_load(readers: int, writers: int, seconds: float) -> dict:
+    from django.db import OperationalError, connection
+    from posts.models import Post
+    from posts.pagination import paginate
+    from posts.slugs import save_with_unique_slug
+
+    stop = time.monotonic() + seconds
+    lock = threading.Lock()
+    results = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0, 'write_latencies': []}
+
+    def reader():
+        cursor = None
+        try:
+            while time.monotonic() < stop:
+                try:
+                    page = paginate(Post.objects.all(), cursor, 20)
+                    cursor = page.next_cursor
+                    with lock:
+                        results['reads'] += 1
+                except OperationalError:
+                    with lock:
+                        results['read_errors'] += 1
+        finally:
+            connection.close()
+
+    def writer(n: int):
+        i = 0
+        try:
+            while time.monotonic() < stop:
+                i += 1
+                started = time.perf_counter()
+                try:
+                    save_with_unique_slug(Post(title=f'Bench {n}', content='x' * 500))
+                    with lock:
+                        results['writes'] += 1
+                        results['write_latencies'].append(time.perf_counter() - started)
+                except OperationalError:
+                    with lock:
+                        results['write_errors'] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(results.pop('write_latencies')) or [0]
+    results.update(
+        reads_per_s=round(results['reads'] / seconds, 1),
+        writes_per_s=round(results['writes'] / seconds, 1),
+        write_p50_ms=round(statistics.median(latencies) * 1000, 2),
+        write_p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        write_max_ms=round(latencies[-1] * 1000, 2),
+        write_wait_total_s=round(sum(latencies), 2),
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=5000, help='Posts created before the run')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        with tempfile.TemporaryDirectory() as tmp:
+            setup_database(Path(tmp) / 'bench.sqlite3', args.seed)
+            print(json.dumps({'profile': args.profile, **run_load(args.readers, args.writers, args.seconds)}))
+        return
+
+    for profile, settings_module in PROFILES.items():
+        # The production profile refuses to start without a key of its own
+        env = {'SECRET_KEY': 'bench-only-secret-key', **os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+        cmd = [sys.executable, '-m', 'bench.sqlite_concurrency', '--profile', profile]
+        cmd += ['--readers', str(args.readers), '--writers', str(args.writers)]
+        cmd += ['--seconds', str(args.seconds), '--seed', str(args.seed)]
+        out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f'{profile:<11} reads/s={r["reads_per_s"]:<9} writes/s={r["writes_per_s"]:<8} '
+            f'write p50={r["write_p50_ms"]}ms p95={r["write_p95_ms"]}ms max={r["write_max_ms"]}ms '
+            f'lock wait={r["write_wait_total_s"]}s  locked errors: reads={r["read_errors"]} '
+            f'writes={r["write_errors"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
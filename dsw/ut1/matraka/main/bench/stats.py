@@ -0,0 +1,7 @@
+"""Summary statistics shared by the benchmarks."""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (need not be sorted)."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
@@ -0,0 +1,123 @@
+"""Benchmark suite: every dataset size x every entry point, results as JSON.
+
+    python -m bench.suite --size 1000 --size 100000 --output results.json
+    python -m bench.suite --size 1000 --baseline results.json --threshold 0.15
+
+Datasets come from ``bench.seed`` (built on first use). Every run gets a
+fresh copy of its dataset, since add/edit requests write to it, and its own
+process, since the entry point decides the settings module (both are the
+production profile; its caches go in the run's temporary directory). With
+``--baseline`` the run fails (exit code 1) when throughput drops or p50/p95
+latency grows by more than ``--threshold``, or when an endpoint issues more
+queries per request than before.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.seed import dataset_path, ensure_datasets, production_env
+
+# Both on the production profile, so they differ only in the server side
+ENTRIES = {'wsgi': 'main.settings_production', 'asgi': 'main.settings_asgi'}
+# p99 is reported but too noisy on short runs to gate on
+LATENCY_KEYS = ('p50_ms', 'p95_ms')
+
+
+def run_one(size: int, entry: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / 'bench.sqlite3'
+        shutil.copyfile(dataset_path(size), database)
+        cmd = [sys.executable, '-m', 'bench.loadgen', '--entry', entry, '--database', str(database)]
+        cmd += ['--requests', str(args.requests), '--concurrency', str(args.concurrency)]
+        cmd += ['--warmup', str(args.warmup), '--seed', str(args.seed)]
+        env = {**os.environ, **production_env(Path(tmp)), 'DJANGO_SETTINGS_MODULE': ENTRIES[entry]}
+        out = subprocess.run(cmd, env=env, check=True, capture_output=True, text=True).stdout
+    return {'size': size, 'entry': entry, **json.loads(out.strip().splitlines()[-1])}
+
+
+def compare(runs: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Human readable regressions of ``runs`` against a previous results file."""
+    previous = {(run['size'], run['entry']): run for run in baseline['runs']}
+    problems = []
+    for run in runs:
+        if (old := previous.get((run['size'], run['entry']))) is None:
+            continue
+        label = f'{run["entry"]}/{run["size"]}'
+        if run['rps'] < old['rps'] * (1 - threshold):
+            problems.append(f'{label}: throughput {old["rps"]} -> {run["rps"]} req/s')
+        for endpoint, stats in run['endpoints'].items():
+            if (old_stats := old['endpoints'].get(endpoint)) is None:
+                continue
+            for key in LATENCY_KEYS:
+                if stats[key] > old_stats[key] * (1 + threshold):
+                    problems.append(f'{label} {endpoint}: {key} {old_stats[key]} -> {stats[key]}')
+            if stats['queries_max'] > old_stats['queries_max']:
+                problems.append(
+                    f'{label} {endpoint}: queries/request {old_stats["queries_max"]} -> {stats["queries_max"]}'
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, action='append', help='Dataset sizes (default: 1000)')
+    parser.add_argument('--entry', choices=ENTRIES, action='append', help='Entry points (default: both)')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help='Write results JSON here')
+    parser.add_argument('--baseline', type=Path, help='Previous results JSON to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    sizes = args.size or [1000]
+    ensure_datasets(sizes, args.seed)
+
+    runs = []
+    for size in sizes:
+        for entry in args.entry or list(ENTRIES):
+            run = run_one(size, entry, args)
+            runs.append(run)
+            print(
+                f'{entry} {size:>8} posts: {run["rps"]:>8} req/s  p50={run["p50_ms"]}ms '
+                f'p95={run["p95_ms"]}ms p99={run["p99_ms"]}ms errors={run["errors"]}'
+            )
+            for endpoint, stats in run['endpoints'].items():
+                print(
+                    f'    {endpoint:<12} p50={stats["p50_ms"]}ms p95={stats["p95_ms"]}ms '
+                    f'p99={stats["p99_ms"]}ms queries={stats["queries_mean"]} (max {stats["queries_max"]})'
+                )
+
+    results = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'runs': runs,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        problems = compare(runs, json.loads(args.baseline.read_text()), args.threshold)
+        for problem in problems:
+            print(f'REGRESSION {problem}', file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Render time of posts/post/list.html with 1k and 10k posts on one page.
+
+    python -m bench.templates --posts 1000 --posts 10000 --repeat 5
+
+Variants, each the median of ``--repeat`` renders of the same posts:
+
+- ``uncached loader``: templates read and compiled on every render.
+- ``cached loader``: compiled once per process (main.settings).
+- ``items, cold``: plus posts.cache.render_items, with an empty cache, so
+  every item is rendered and stored.
+- ``items, warm``: the same once the items are cached, as when a list page
+  is rendered again after one of its posts changed.
+
+Loading the posts from the database is not timed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from bench.seed import dataset_path, ensure_datasets, use_database
+
+VARIANTS = ('uncached loader', 'cached loader', 'items, cold', 'items, warm')
+
+
+def render_list(posts: int, variant: str) -> float:
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory, override_settings
+    from posts import cache
+    from posts.models import Post
+    from posts.views import render_item
+
+    request = RequestFactory().get('/posts/')
+    request.user = AnonymousUser()
+    # Any TEMPLATES change rebuilds the engines, so only this variant touches it
+    overrides = nullcontext()
+    if variant == 'uncached loader':
+        (engine,) = settings.TEMPLATES
+        options = {**engine['OPTIONS'], 'loaders': settings.SOURCE_TEMPLATE_LOADERS}
+        overrides = override_settings(TEMPLATES=[{**engine, 'OPTIONS': options}])
+    if variant == 'items, cold':
+        cache.get_cache().clear()
+
+    page = list(Post.objects.defer('content').order_by('id')[:posts])
+    with overrides:
+        started = time.perf_counter()
+        if variant.startswith('items'):
+            cache.render_items(page, render_item)
+        render_to_string('posts/post/list.html', {'posts': page, 'page': {}}, request)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, action='append', help='Posts on the page (default: 1000 and 10000)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cache', choices=('locmem', 'sqlite'), default='locmem', help='Backend of the items')
+    args = parser.parse_args()
+    sizes = args.posts or [1000, 10_000]
+
+    # One dataset, the first N posts of it for every size
+    ensure_datasets([max(sizes)])
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+    import django
+    from django.conf import settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        database = tmp / 'bench.sqlite3'
+        shutil.copyfile(dataset_path(max(sizes)), database)
+        use_database(database)
+        backends = {
+            'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench'},
+            'sqlite': {'BACKEND': 'shared.cache.SQLiteCache', 'LOCATION': str(tmp / 'cache.sqlite3')},
+        }
+        settings.CACHES = {'default': {**backends[args.cache], 'OPTIONS': {'MAX_ENTRIES': 2 * max(sizes)}}}
+        settings.DEBUG = False
+        django.setup()
+
+        summary = {}
+        for size in sizes:
+            summary[size] = {}
+            for variant in VARIANTS:
+                if variant == 'items, warm':
+                    render_list(size, 'items, cold')
+                times = [render_list(size, variant) for _ in range(args.repeat)]
+                summary[size][variant] = ms = round(statistics.median(times) * 1000, 1)
+                print(f'{size:>6} posts  {variant:<16} {ms:>9}ms')
+    print(json.dumps({'cache': args.cache, 'repeat': args.repeat, 'render_ms': summary}))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,25 @@ ASGI config for main project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+It defaults to the ``main.settings_asgi`` profile, which serves the native
+async posts views on the bounded threads of ``shared.asgi``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+from django.conf import settings
+
+from shared.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings_asgi')
 
 application = get_asgi_application()
+
+# URL resolver, templates and connections ready before the first request
+if settings.WARMUP_ON_START:
+    from shared.startup import warmup
+
+    warmup()
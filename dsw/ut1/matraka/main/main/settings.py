@@ -10,11 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-print(BASE_DIR)
 
 
 # Quick-start development settings - unsuitable for production
@@ -45,22 +45,36 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Django's, minus the @sessionless read-only views (shared.sessions)
+    'shared.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shared.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'main.urls'
 
+# Where templates are read from, below the cached loader
+SOURCE_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Each template is compiled once per process (runserver's reloader
+            # clears them on change); TEMPLATES_CACHED=0 reads them on every render
+            'loaders': (
+                [('django.template.loaders.cached.Loader', SOURCE_TEMPLATE_LOADERS)]
+                if os.environ.get('TEMPLATES_CACHED', '1') == '1'
+                else SOURCE_TEMPLATE_LOADERS
+            ),
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -84,6 +98,53 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Backend can be switched without touching code, e.g.
+#   POSTS_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   POSTS_CACHE_LOCATION=/var/tmp/matraka-cache
+# With several worker processes, shared.cache.SQLiteCache keeps one cache for
+# all of them in a SQLite file (the production profile uses it):
+#   POSTS_CACHE_BACKEND=shared.cache.SQLiteCache
+#   POSTS_CACHE_LOCATION=/var/tmp/matraka-cache.sqlite3
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'POSTS_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('POSTS_CACHE_LOCATION', 'matraka'),
+        # Room for the post items of list pages, not only the pages (default 300)
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    }
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# Read from the cache, written through to django_session. Expired rows are
+# removed with `manage.py purge_sessions` (batched, unlike clearsessions).
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'shared.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'shared.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'shared.startup': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -120,7 +181,77 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# collectstatic target, served by shared.middleware.StaticFilesMiddleware in production
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Minify CSS on collectstatic (shared.staticfiles.CompressedManifestStaticFilesStorage)
+STATIC_MINIFY_CSS = True
+
+# Cache-Control max-age of static files without a content hash in their name
+STATIC_MAX_AGE = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Profiling (shared.middleware.ProfilingMiddleware)
+
+# Fraction of requests measured (Server-Timing header + log line); 0 = off
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+# Also record peak allocated memory of sampled requests (tracemalloc, slower)
+PROFILING_TRACE_MEMORY = True
+# Where "X-Profile: cprofile|pyinstrument" dumps go (staff users only)
+PROFILING_DUMP_DIR = BASE_DIR / 'profiles'
+
+
+# Background jobs (shared.jobs, run by `manage.py run_workers`)
+
+# Jobs a worker runs at the same time, one process each. SQLite takes one
+# writer at a time, so more processes mostly help jobs that aren't writing.
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+# Attempts of a failing job before it is marked as failed
+JOBS_MAX_ATTEMPTS = 3
+# Seconds before the first retry, doubled on every further one, up to the max
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 3600
+# Seconds a claimed job stays owned by a worker that stopped renewing it
+JOBS_LEASE = 60
+# Seconds between looks at the queue while a worker is idle
+JOBS_POLL_INTERVAL = 1.0
+
+
+# Worker start-up (shared.startup, `manage.py startup_profile`)
+
+# Build the URL resolver, compile templates and connect before the first
+# request, when main.wsgi / main.asgi are imported (on in production)
+WARMUP_ON_START = False
+# Apps whose templates are compiled by the warm-up; None = every template
+WARMUP_TEMPLATE_APPS = ('posts', 'shared')
+
+
+# ASGI (main.asgi, shared.asgi)
+
+# Threads that run the sync code of all requests (middleware, sync views, the
+# ORM); None = Django's default of one thread per request in flight
+ASGI_THREADS = None
+
+
+# Posts
+
+# Number of posts per page on the list view (overridable with ?size=)
+POSTS_PAGE_SIZE = 20
+# Hard cap for ?size= so a client can't ask for the whole table
+POSTS_MAX_PAGE_SIZE = 100
+# Cache alias used for rendered post pages and slug lookups
+POSTS_CACHE_ALIAS = 'default'
+# Seconds a rendered page may live (writes invalidate it earlier)
+POSTS_CACHE_TIMEOUT = 300
+# Seconds a rendered list item may live; its key has the post version, so
+# this only bounds how long items of posts nobody looks at take up room
+POSTS_FRAGMENT_TIMEOUT = 24 * 3600
+# Route posts pages to the async views (enabled by main.settings_asgi)
+POSTS_ASYNC_VIEWS = False
+# Uploads waiting for the import_posts job (deleted once imported)
+POSTS_IMPORT_DIR = BASE_DIR / 'imports'
@@ -0,0 +1,17 @@
+"""
+ASGI deployment profile: the production profile (``main.settings_production``,
+so ``SECRET_KEY`` must be set) served by ``main.asgi``. Run it with e.g.:
+
+    uvicorn main.asgi:application --workers 1
+
+The posts pages are the async views of ``posts.async_views``, and the sync
+code of all requests runs on ``ASGI_THREADS`` threads (``shared.asgi``), so
+one worker process can keep many slow clients waiting without a thread each.
+"""
+
+from .settings_production import *  # noqa: F403
+
+POSTS_ASYNC_VIEWS = True
+# A write holds SQLite's lock for the whole database; more threads than this
+# mostly wait for it
+ASGI_THREADS = 8
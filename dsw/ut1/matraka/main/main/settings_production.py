@@ -0,0 +1,102 @@
+"""
+Production profile: ``DJANGO_SETTINGS_MODULE=main.settings_production``.
+
+``SECRET_KEY`` must be set in the environment. ``ALLOWED_HOSTS`` (comma
+separated) should be too; it defaults to localhost only.
+
+SQLite is tuned for a web workload with concurrent readers and writers:
+
+- WAL journal, so readers never block the writer (and vice versa).
+- ``synchronous=NORMAL``: safe with WAL, fsync only at checkpoints.
+- 64 MiB page cache and 256 MiB of memory-mapped I/O per connection.
+- ``busy_timeout``: wait for the write lock instead of failing at once.
+- ``BEGIN IMMEDIATE`` for every ``transaction.atomic()`` block, so a write
+  transaction takes the lock up front and never hits the "database is locked"
+  deadlock of upgrading a read transaction.
+- Persistent connections, so requests don't reconnect and re-run the pragmas.
+
+The cache is shared by all the worker processes of the host
+(``shared.cache.SQLiteCache``, a file of its own next to the database)
+instead of one locmem copy per process. Sessions live in a second one, so
+nothing touches django_session and evicting pages never logs anyone out.
+
+Workers warm up before their first request (``shared.startup.warmup``):
+URL resolver, database and cache connections, and every template compiled,
+so a template that doesn't compile stops the worker from starting.
+
+Static files are served by the app itself: ``collectstatic`` writes hashed,
+precompressed copies to ``STATIC_ROOT`` and ``StaticFilesMiddleware`` serves
+them with far-future cache headers.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F403
+from .settings import BASE_DIR, MIDDLEWARE
+
+DEBUG = False
+
+# Never the development key of main.settings, which is public
+try:
+    SECRET_KEY = os.environ['SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set SECRET_KEY in the environment to use main.settings_production') from None
+
+WARMUP_ON_START = True
+WARMUP_TEMPLATE_APPS = None
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64_000,  # negative = KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY',
+}
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 5,
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('POSTS_CACHE_BACKEND', 'shared.cache.SQLiteCache'),
+        'LOCATION': os.environ.get('POSTS_CACHE_LOCATION', str(BASE_DIR / 'cache.sqlite3')),
+        'OPTIONS': {'MAX_ENTRIES': 50_000, 'MAX_BYTES': 256 * 1024 * 1024},
+    },
+    'sessions': {
+        'BACKEND': 'shared.cache.SQLiteCache',
+        'LOCATION': os.environ.get('SESSIONS_CACHE_LOCATION', str(BASE_DIR / 'sessions.sqlite3')),
+        # Past this, the sessions used least recently are dropped
+        'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+    },
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_CACHE_ALIAS = 'sessions'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'shared.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+# Right after SecurityMiddleware (MIDDLEWARE[0]), before sessions and the rest
+MIDDLEWARE = [
+    *MIDDLEWARE[:1],
+    'shared.middleware.StaticFilesMiddleware',
+    *MIDDLEWARE[1:],
+]
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
 application = get_wsgi_application()
+
+# URL resolver, templates and connections ready before the first request
+if settings.WARMUP_ON_START:
+    from shared.startup import warmup
+
+    warmup()
@@ -1,11 +1,129 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Substr
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
+from django.utils.text import slugify
 
+from . import cache
 from .models import Post
+from .search import matching_ids
+
+PREVIEW_LENGTH = 80
+# Filtered changelists are counted exactly, but only up to here
+COUNT_LIMIT = 10_000
+# Posts per DELETE of the delete_selected action
+DELETE_BATCH_SIZE = 1000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Avoids ``COUNT(*)`` over the whole table.
+
+    Unfiltered, the count is the highest id: one step down the primary key
+    index, too high only by the posts deleted so far. Filtered, rows are
+    counted for real but the count stops at ``COUNT_LIMIT``.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            return queryset.model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0
+        return queryset[: COUNT_LIMIT + 1].count()
+
+
+class PostChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        # Never load the full content: only the columns shown plus a preview cut in SQL
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only('pk', 'title', 'slug').annotate(
+            content_preview=Substr('content', 1, PREVIEW_LENGTH)
+        )
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'content')
+    list_display = ('pk', 'title', 'slug', 'preview')
+    # Newest first, walking the primary key index
+    ordering = ('-pk',)
+    search_fields = ('title', 'slug')
+    search_help_text = 'Words of the title (or their beginning), or the start of the slug.'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_selected',)
+    readonly_fields = ('excerpt', 'word_count', 'reading_time')
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    @admin.display(description='content')
+    def preview(self, post):
+        if len(post.content_preview) < PREVIEW_LENGTH:
+            return post.content_preview
+        return f'{post.content_preview}…'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Full-text index for the title and a range over the unique index for
+        the slug, instead of ``LIKE '%term%'`` scans over both columns."""
+        if not search_term.strip():
+            return queryset, False
+        matches = Q(pk__in=[])
+        if (title_ids := matching_ids(search_term, column='title', prefix=True)) is not None:
+            matches |= Q(pk__in=title_ids)
+        if slug := slugify(search_term):
+            # '~' sorts after every character a slug can have
+            matches |= Q(slug__gte=slug, slug__lt=f'{slug}~')
+        return queryset.filter(matches), False
+
+    @admin.action(description='Delete selected posts', permissions=['delete'])
+    def delete_selected(self, request, queryset):
+        """Batches of ``DELETE_BATCH_SIZE`` posts, one short transaction each.
+
+        ``QuerySet.delete()`` would load every post to send ``post_delete``
+        (posts.signals invalidates the cache there), so each batch is a plain
+        DELETE by primary key and the cache is cleared for it in bulk instead.
+        Only the ids and slugs of one batch are in memory at a time.
+        """
+        if request.POST.get('post') != 'yes':
+            context = dict(
+                self.admin_site.each_context(request),
+                title='Are you sure?',
+                opts=self.opts,
+                count=queryset.count(),
+                sample=queryset[:10],
+                selected=request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                select_across=request.POST.get('select_across', '0'),
+                action_checkbox_name=helpers.ACTION_CHECKBOX_NAME,
+            )
+            return TemplateResponse(request, 'admin/posts/post/delete_selected_confirmation.html', context)
+
+        deleted = 0
+        for rows in pk_batches(queryset, DELETE_BATCH_SIZE):
+            deleted += delete_rows(queryset.db, rows)
+        self.message_user(request, f'Deleted {deleted} posts.', messages.SUCCESS)
+        return None
+
+
+def pk_batches(queryset, size: int):
+    """``(pk, slug)`` lists of up to ``size`` posts, walking the primary key."""
+    queryset = queryset.order_by('pk').values_list('pk', 'slug')
+    last_pk = 0
+    while rows := list(queryset.filter(pk__gt=last_pk)[:size]):
+        yield rows
+        last_pk = rows[-1][0]
 
 
-# Register your models here.
+def delete_rows(using: str, rows) -> int:
+    pks = [pk for pk, _ in rows]
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as db:
+            db.execute(
+                f'DELETE FROM {Post._meta.db_table} WHERE id IN ({", ".join(["%s"] * len(pks))})', pks
+            )
+            count = db.rowcount
+        transaction.on_commit(lambda: cache.invalidate_posts(rows, tail=True), using=using)
+    return count
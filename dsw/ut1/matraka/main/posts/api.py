@@ -0,0 +1,93 @@
+"""Read-only JSON API over posts.
+
+    GET /posts/api/?size=50&cursor=...&fields=title,slug
+    GET /posts/api/<slug>/?fields=title,content
+
+``fields`` picks the columns (``id`` is always there): the list maps it onto
+``values()``, so unrequested columns, ``content`` above all, are never read.
+Lists are paged with the same keyset cursors as the HTML list and both
+endpoints answer conditional requests with 304 before querying rows.
+
+Rows go from ``values()`` straight to orjson (optional dependency) which
+handles datetimes natively; without it the stdlib encoder is used.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from shared.sessions import sessionless
+
+from . import cache
+from .models import Post
+from .pagination import InvalidCursor, get_page_size, page_aggregate, paginate
+from .views import LIST_AGGREGATES, make_etag, not_modified, with_validators
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LIST_FIELDS = ('id', 'title', 'slug', 'excerpt', 'word_count', 'reading_time', 'created_at', 'updated_at')
+DETAIL_FIELDS = (*LIST_FIELDS, 'content')
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def json_error(message: str, status: int) -> HttpResponse:
+    return json_response({'error': message}, status)
+
+
+def parse_fields(requested: str | None, default: tuple[str, ...]) -> tuple[str, ...]:
+    """``?fields=a,b`` as a column tuple starting with ``id``; ValueError on unknown names."""
+    if not requested:
+        return default
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    if unknown := [field for field in fields if field not in DETAIL_FIELDS]:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return ('id', *dict.fromkeys(field for field in fields if field != 'id'))
+
+
+@sessionless
+def post_list(request):
+    try:
+        fields = parse_fields(request.GET.get('fields'), LIST_FIELDS)
+    except ValueError as exc:
+        return json_error(str(exc), 400)
+    size = get_page_size(request.GET.get('size'))
+    cursor = request.GET.get('cursor')
+    try:
+        meta = page_aggregate(Post.objects.all(), cursor, size, **LIST_AGGREGATES)
+    except InvalidCursor:
+        return json_error('Invalid cursor', 400)
+    etag, last_modified = make_etag('api', cursor, size, fields, *meta.values()), meta['updated']
+    if (response := not_modified(request, etag, last_modified)) is not None:
+        return response
+
+    page = paginate(Post.objects.values(*fields), cursor, size)
+    data = {'results': page.object_list, 'next': page.next_cursor, 'prev': page.prev_cursor}
+    return with_validators(json_response(data), etag, last_modified)
+
+
+@sessionless
+def post_detail(request, post_slug: str):
+    try:
+        fields = parse_fields(request.GET.get('fields'), DETAIL_FIELDS)
+    except ValueError as exc:
+        return json_error(str(exc), 400)
+    # Same cached lookup as the HTML detail page: often no query at all
+    if (post := cache.get_post(post_slug)) is None:
+        return json_error(f'Post with slug "{post_slug}" does not exist', 404)
+    etag, last_modified = make_etag('api', post.pk, post.updated_at, fields), post.updated_at
+    if (response := not_modified(request, etag, last_modified)) is not None:
+        return response
+    return with_validators(json_response({field: getattr(post, field) for field in fields}), etag, last_modified)
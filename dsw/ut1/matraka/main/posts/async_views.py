@@ -0,0 +1,32 @@
+"""Native ``async def`` versions of the views in ``views.py`` for the ASGI profile.
+
+The cache and the database are sync (Django's cache backends implement their
+``a*`` methods with ``sync_to_async`` as well), so every request does all of
+that work in a single ``sync_to_async`` hop: the sync view, run on one of the
+threads ``shared.asgi.ASGIHandler`` shares between requests. Many small hops,
+one per cache or ORM call, would each wait for a free thread again.
+"""
+
+from asgiref.sync import sync_to_async
+
+from shared.sessions import sessionless
+
+from . import views
+
+
+async def add_post(request):
+    return await sync_to_async(views.add_post)(request)
+
+
+async def edit_post(request, post_slug: str):
+    return await sync_to_async(views.edit_post)(request, post_slug)
+
+
+@sessionless
+async def post_list(request):
+    return await sync_to_async(views.post_list)(request)
+
+
+@sessionless
+async def post_detail(request, post_slug: str):
+    return await sync_to_async(views.post_detail)(request, post_slug)
@@ -0,0 +1,289 @@
+"""Caching of post pages and per-slug Post lookups.
+
+Every post has a version counter (``posts:v:<pk>``) that is bumped whenever it
+is saved or deleted. Detail pages embed that version in their key, and list
+pages remember the version of every post they show, so a write invalidates
+exactly the pages that contain the post. A separate ``tail`` version covers the
+last list page, where new posts show up.
+
+The item of each post on list pages is also cached on its own, under its id
+and version: a page that has to be rendered again (another post on it
+changed, another cursor or size) reuses the items of the posts that didn't.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+TAIL = 'tail'
+STATS_KINDS = ('lookup', 'detail', 'list')
+# How long to wait for another worker that is already rendering the same key
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.02
+# Seconds a worker keeps its hit/miss counts before adding them to the cache
+STATS_FLUSH_INTERVAL = 1.0
+
+_MISSING = object()
+# Per-process single flight: a lock per key so threads of one worker never
+# compute the same entry twice. The cache-level lock covers other processes.
+_local_locks: dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+class _PendingStats:
+    """``record()`` counts of this process not yet in the cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.flushed_at = 0.0
+
+    def add(self, key: str) -> dict[str, int]:
+        """Count ``key``; returns the counts to write now, if it is time to."""
+        with self.lock:
+            self.counts[key] += 1
+            if time.monotonic() - self.flushed_at < STATS_FLUSH_INTERVAL:
+                return {}
+            return self._take()
+
+    def take(self) -> dict[str, int]:
+        with self.lock:
+            return self._take()
+
+    def _take(self) -> dict[str, int]:
+        counts, self.counts, self.flushed_at = dict(self.counts), Counter(), time.monotonic()
+        return counts
+
+
+_pending_stats = _PendingStats()
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def version_key(pk) -> str:
+    return f'posts:v:{pk}'
+
+
+def slug_key(slug: str) -> str:
+    return f'posts:slug:{slug}'
+
+
+def record(kind: str, hit: bool):
+    """Count a hit or a miss. A worker adds up its counts and writes them at
+    most once per ``STATS_FLUSH_INTERVAL``, not a cache write per request."""
+    flush_stats(_pending_stats.add(f'posts:stats:{kind}:{"hits" if hit else "misses"}'))
+
+
+def flush_stats(counts: dict[str, int]):
+    cache = get_cache()
+    for key, count in counts.items():
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            if not cache.add(key, count, timeout=None):
+                cache.incr(key, count)
+
+
+def stats() -> dict[str, dict[str, int]]:
+    """Counts of every worker, up to their last flush (and all of this one's)."""
+    flush_stats(_pending_stats.take())
+    keys = [f'posts:stats:{kind}:{field}' for kind in STATS_KINDS for field in ('hits', 'misses')]
+    values = get_cache().get_many(keys)
+    return {
+        kind: {field: values.get(f'posts:stats:{kind}:{field}', 0) for field in ('hits', 'misses')}
+        for kind in STATS_KINDS
+    }
+
+
+def reset_stats():
+    _pending_stats.take()
+    get_cache().delete_many(
+        [f'posts:stats:{kind}:{field}' for kind in STATS_KINDS for field in ('hits', 'misses')]
+    )
+
+
+def new_version() -> int:
+    """Version for a key that is missing, evicted or not: one no stored entry can
+    have seen, which a fixed starting value like 1 would not be after an eviction."""
+    return time.time_ns()
+
+
+def add_many(cache, data: dict, timeout=None) -> list[str]:
+    """``cache.add`` of every item; returns the keys that were already there.
+    One transaction on a backend with ``add_many`` (``shared.cache.SQLiteCache``),
+    a call per key on Django's."""
+    if hasattr(cache, 'add_many'):
+        return cache.add_many(data, timeout=timeout)
+    return [key for key, value in data.items() if not cache.add(key, value, timeout=timeout)]
+
+
+def get_versions(pks) -> dict[str, int]:
+    """Current version of every post in ``pks``; missing ones get ``new_version()``."""
+    cache = get_cache()
+    keys = [version_key(pk) for pk in pks]
+    versions = cache.get_many(keys)
+    if missing := {key: new_version() for key in keys if key not in versions}:
+        # add, not set: a version stored meanwhile (a bump by a write) must win
+        versions.update(missing)
+        if taken := add_many(cache, missing):
+            versions.update(cache.get_many(taken))
+    return versions
+
+
+def bump_version(pk):
+    cache = get_cache()
+    key = version_key(pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted or never read
+        cache.set(key, new_version(), timeout=None)
+
+
+def invalidate_post(pk, slugs=(), tail: bool = False):
+    """Drop everything showing post ``pk``; ``tail`` when posts were added or removed."""
+    bump_version(pk)
+    if tail:
+        bump_version(TAIL)
+    forget_slugs(slugs)
+
+
+def invalidate_posts(rows, tail: bool = False):
+    """``invalidate_post`` for many ``(pk, slug)`` pairs with a couple of cache calls."""
+    cache = get_cache()
+    version = new_version()
+    cache.set_many({version_key(pk): version for pk, _ in rows}, timeout=None)
+    if tail:
+        bump_version(TAIL)
+    forget_slugs(slug for _, slug in rows)
+
+
+def invalidate_new_posts(slugs):
+    """For posts added without signals (bulk_create): drop the lookups that
+    cached their slugs as missing, and the last list page."""
+    bump_version(TAIL)
+    forget_slugs(slugs)
+
+
+def forget_slugs(slugs):
+    get_cache().delete_many([slug_key(slug) for slug in slugs if slug])
+
+
+def item_keys(posts, versions) -> dict[int, str]:
+    return {post.pk: f'posts:item:{post.pk}:{versions[version_key(post.pk)]}' for post in posts}
+
+
+def render_items(posts, render):
+    """Set ``post.item_html`` on every post: its list item, from the cache or ``render(post)``."""
+    cache = get_cache()
+    keys = item_keys(posts, get_versions([post.pk for post in posts]))
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    for post in posts:
+        html = cached.get(keys[post.pk])
+        if html is None:
+            html = rendered[keys[post.pk]] = render(post)
+        post.item_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, timeout=settings.POSTS_FRAGMENT_TIMEOUT)
+
+
+def single_flight(key: str, compute):
+    """Compute ``key`` once even if many requests miss it at the same time.
+
+    Returns ``_MISSING`` to the callers that waited on someone else's lock and
+    should read the cache again.
+    """
+    with _local_locks_guard:
+        local_lock = _local_locks.setdefault(key, threading.Lock())
+    if not local_lock.acquire(blocking=False):
+        # Another thread of this worker is on it: wait and re-read the cache
+        with local_lock:
+            return _MISSING
+    try:
+        cache = get_cache()
+        lock_key = f'{key}:lock'
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            try:
+                return compute()
+            finally:
+                cache.delete(lock_key)
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline and cache.get(lock_key) is not None:
+            time.sleep(LOCK_POLL_INTERVAL)
+        return _MISSING
+    finally:
+        with _local_locks_guard:
+            _local_locks.pop(key, None)
+        local_lock.release()
+
+
+def get_post(slug: str) -> Post | None:
+    """Post with ``slug`` or None. Misses are cached too, saves clear them."""
+    cache = get_cache()
+    key = slug_key(slug)
+    post = cache.get(key, _MISSING)
+    if post is not _MISSING:
+        record('lookup', hit=True)
+        return post
+    record('lookup', hit=False)
+    post = Post.objects.filter(slug=slug).first()
+    cache.set(key, post, timeout=settings.POSTS_CACHE_TIMEOUT)
+    return post
+
+
+def cached_detail(post: Post, render) -> tuple[str, bool]:
+    """Rendered detail page of ``post``; the key carries the post version."""
+    cache = get_cache()
+    version = get_versions([post.pk])[version_key(post.pk)]
+    key = f'posts:detail:{post.pk}:{version}'
+    while True:
+        if (html := cache.get(key)) is not None:
+            record('detail', hit=True)
+            return html, True
+
+        def compute():
+            html = render()
+            cache.set(key, html, timeout=settings.POSTS_CACHE_TIMEOUT)
+            return html
+
+        if (html := single_flight(key, compute)) is not _MISSING:
+            record('detail', hit=False)
+            return html, False
+
+
+def cached_list(cursor: str | None, size: int, render) -> tuple[str, bool]:
+    """Rendered list page.
+
+    ``render`` returns ``(html, pks, is_last)``; the entry is kept together with
+    the versions of the posts it shows and is only served while they match.
+    """
+    cache = get_cache()
+    key = f'posts:list:{size}:{cursor or ""}'
+
+    def is_fresh(entry) -> bool:
+        return entry is not None and cache.get_many(list(entry['versions'])) == entry['versions']
+
+    while True:
+        if is_fresh(entry := cache.get(key)):
+            record('list', hit=True)
+            return entry['html'], True
+
+        def compute():
+            html, pks, is_last = render()
+            versions = get_versions([*pks, TAIL] if is_last else pks)
+            cache.set(key, {'html': html, 'versions': versions}, timeout=settings.POSTS_CACHE_TIMEOUT)
+            return html
+
+        if (html := single_flight(key, compute)) is not _MISSING:
+            record('list', hit=False)
+            return html, False
+
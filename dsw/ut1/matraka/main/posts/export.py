@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+import zlib
+
+from .models import Post
+
+EXPORT_FIELDS = ('id', 'title', 'slug', 'content')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+# Rows fetched from SQLite per round trip and serialized per yielded chunk
+CHUNK_SIZE = 2000
+
+
+def export_queryset(after: int = 0):
+    """All posts with ``id > after`` in id order, as dicts."""
+    # values(), not values_list(): aiterator() runs the latter's query in the event loop
+    return Post.objects.filter(id__gt=after).order_by('id').values(*EXPORT_FIELDS)
+
+
+def export_rows(after: int = 0, chunk_size: int = CHUNK_SIZE):
+    """``export_queryset`` streamed from the DB."""
+    return export_queryset(after).iterator(chunk_size=chunk_size)
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _abatches(rows, size: int):
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_encoder():
+    """A function from a batch of rows to their bytes; called with ``[]`` at the end."""
+
+    def encode(batch) -> bytes:
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch).encode()
+
+    return encode
+
+
+def csv_encoder():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    def encode(batch) -> bytes:
+        # The header goes out with the first batch, or alone for an empty export
+        writer.writerows(row.values() for row in batch)
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    return encode
+
+
+ENCODERS = {'ndjson': ndjson_encoder, 'csv': csv_encoder}
+
+
+def gzip_chunks(chunks, level: int = 6):
+    """Gzip a byte stream on the fly, one compressed block per input chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+async def agzip_chunks(chunks, level: int = 6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(fmt: str, after: int = 0, chunk_size: int = CHUNK_SIZE, gzip: bool = False):
+    encode = ENCODERS[fmt]()
+
+    def chunks():
+        for batch in _batches(export_rows(after, chunk_size), chunk_size):
+            yield encode(batch)
+        if tail := encode([]):
+            yield tail
+
+    return gzip_chunks(chunks()) if gzip else chunks()
+
+
+def aexport_chunks(fmt: str, after: int = 0, chunk_size: int = CHUNK_SIZE, gzip: bool = False):
+    """``export_chunks`` as an async iterator, for ASGI: a sync one would be
+    read to the end by Django before the first byte is sent."""
+    encode = ENCODERS[fmt]()
+
+    async def chunks():
+        async for batch in _abatches(export_queryset(after).aiterator(chunk_size=chunk_size), chunk_size):
+            yield encode(batch)
+        if tail := encode([]):
+            yield tail
+
+    return agzip_chunks(chunks()) if gzip else chunks()
@@ -3,13 +3,13 @@ from django import forms
 from .models import Post
 
 
-class AddPostForm(forms.Form):
+class AddPostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('title', 'content')
 
 
-class EditPostForm(forms.Form):
+class EditPostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('title', 'content')
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts import cache
+from posts.models import SUMMARY_FIELDS, Post
+from shared import jobs
+
+
+class Command(BaseCommand):
+    help = 'Recompute excerpt, word count and reading time of posts, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only posts with content but no word count (e.g. written with raw SQL)',
+        )
+
+    def handle(self, *args, **options):
+        # The slug too, for the cached lookups invalidate_posts has to drop
+        posts = Post.objects.order_by('pk').only('pk', 'content', 'slug')
+        if options['missing']:
+            posts = posts.filter(word_count=0).exclude(content='')
+        batch_size = options['batch_size']
+        updated, last_pk = 0, 0
+        started = time.perf_counter()
+
+        # Keyset batches: each one is a short transaction, memory stays flat
+        while batch := list(posts.filter(pk__gt=last_pk)[:batch_size]):
+            # bulk_update doesn't apply auto_now: list pages must see the change
+            now = timezone.now()
+            for post in batch:
+                post.refresh_summary()
+                post.updated_at = now
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, [*SUMMARY_FIELDS, 'updated_at'])
+                # bulk_update sends no signals: drop the cached pages showing these posts
+                rows = [(post.pk, post.slug) for post in batch]
+                transaction.on_commit(lambda rows=rows: cache.invalidate_posts(rows))
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(f'{updated} posts ({updated / elapsed:,.0f} posts/s)')
+            jobs.progress(updated)
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} posts'))
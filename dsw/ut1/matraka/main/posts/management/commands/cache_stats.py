@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the posts cache (per process with locmem, global with a shared backend)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters afterwards')
+
+    def handle(self, *args, **options):
+        for kind, counters in cache.stats().items():
+            hits, misses = counters['hits'], counters['misses']
+            total = hits + misses
+            ratio = f'{hits / total:.1%}' if total else '-'
+            self.stdout.write(f'{kind:<8} hits={hits:<8} misses={misses:<8} hit ratio={ratio}')
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
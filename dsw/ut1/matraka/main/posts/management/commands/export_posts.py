@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.export import CHUNK_SIZE, CONTENT_TYPES, export_chunks
+
+
+class Command(BaseCommand):
+    help = 'Stream all posts as NDJSON or CSV to stdout or a file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=tuple(CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--after', type=int, default=0, help='Resume: only posts with id > AFTER')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per DB fetch')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        chunks = export_chunks(options['format'], options['after'], options['chunk_size'], options['gzip'])
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
@@ -0,0 +1,141 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import cache
+from posts.models import Post, summarize
+from posts.slugs import SlugAllocator
+from shared import jobs
+
+TITLE_MAX_LENGTH = Post._meta.get_field('title').max_length
+
+
+def read_ndjson(stream):
+    for lineno, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except json.JSONDecodeError as err:
+            yield lineno, err
+
+
+def read_csv(stream):
+    csv.field_size_limit(sys.maxsize)
+    # Line 1 is the header
+    yield from enumerate(csv.DictReader(stream), start=2)
+
+
+def validate(row) -> str | None:
+    if isinstance(row, Exception):
+        return str(row)
+    if not isinstance(row, dict):
+        return 'row is not an object'
+    title, content = row.get('title'), row.get('content')
+    if not isinstance(title, str) or not title.strip():
+        return 'missing title'
+    if len(title) > TITLE_MAX_LENGTH:
+        return f'title longer than {TITLE_MAX_LENGTH} characters'
+    if not isinstance(content, str):
+        return 'missing content'
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts from NDJSON or CSV (use "-" to read from stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Path to an .ndjson/.jsonl/.csv file or "-" for stdin')
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            help='Input format (guessed from the file extension when omitted)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, help='Rows per INSERT statement (default: 1000)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20_000,
+            help='Rows per transaction (default: 20000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the input, nothing is written',
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        fmt = options['format'] or ('csv' if source.endswith('.csv') else 'ndjson')
+        batch_size, chunk_size = options['batch_size'], options['chunk_size']
+        if batch_size < 1 or chunk_size < 1:
+            raise CommandError('--batch-size and --chunk-size must be positive')
+        chunk_size = max(chunk_size, batch_size)
+
+        if source == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(source, newline='', encoding='utf-8')
+            except OSError as err:
+                raise CommandError(err) from err
+
+        reader = read_csv if fmt == 'csv' else read_ndjson
+        with stream:
+            self.run(reader(stream), batch_size, chunk_size, options['dry_run'])
+
+    def run(self, rows, batch_size: int, chunk_size: int, dry_run: bool):
+        allocator = SlugAllocator()
+        imported = invalid = 0
+        started = time.perf_counter()
+        # Source rows read, valid or not. A retried job goes on after the last
+        # chunk an earlier attempt committed instead of importing it again.
+        read = jobs.resume_from()
+        if read:
+            self.stdout.write(f'Resuming after {read} rows')
+            rows = islice(rows, read, None)
+
+        while chunk := list(islice(rows, chunk_size)):
+            read += len(chunk)
+            posts = []
+            for lineno, row in chunk:
+                if error := validate(row):
+                    invalid += 1
+                    self.stderr.write(f'line {lineno}: {error}')
+                    continue
+                posts.append(Post(title=row['title'], content=row['content'], **summarize(row['content'])))
+            imported += len(posts)
+            message = f'{imported} imported, {invalid} invalid rows'
+
+            if dry_run:
+                jobs.progress(read, message=message)
+            else:
+                with transaction.atomic():
+                    if posts:
+                        slugs = allocator.allocate([p.title for p in posts])
+                        for post, slug in zip(posts, slugs):
+                            post.slug = slug
+                        Post.objects.bulk_create(posts, batch_size=batch_size)
+                        # bulk_create sends no signals: clear cached misses of the
+                        # new slugs and the last list page as each chunk commits
+                        transaction.on_commit(lambda slugs=slugs: cache.invalidate_new_posts(slugs))
+                    jobs.checkpoint(read, message=message)
+
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(f'{imported} rows ({imported / elapsed:,.0f} rows/s), {invalid} invalid')
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        verb = 'Validated' if dry_run else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {imported} posts in {elapsed:.2f}s '
+                f'({imported / elapsed:,.0f} rows/s), {invalid} invalid rows skipped'
+            )
+        )
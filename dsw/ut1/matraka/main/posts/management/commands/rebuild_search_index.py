@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.search import optimize_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of posts from the posts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='Also merge the index b-trees once rebuilt (slower, faster queries)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_index()
+        if options['optimize']:
+            optimize_index()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt in {elapsed:.2f}s'))
@@ -0,0 +1,57 @@
+import re
+
+from django.db import migrations
+from django.db.models import Count
+from django.utils.text import slugify
+
+BATCH_SIZE = 500
+SLUG_MAX_LENGTH = 256
+SUFFIX_RESERVE = 8
+
+
+def dedupe_slugs(apps, schema_editor):
+    """Rename every duplicated slug but the oldest one to a free ``<slug>-<n>``.
+
+    Duplicate groups are found with a single GROUP BY and rewritten with
+    bulk_update in batches, so the migration doesn't load the whole table.
+    """
+    Post = apps.get_model('posts', 'Post')
+
+    # Empty slugs can't be routed at all: derive them from the title first.
+    for post in Post.objects.filter(slug='').only('pk', 'title').iterator(chunk_size=BATCH_SIZE):
+        post.slug = slugify(post.title)[: SLUG_MAX_LENGTH - SUFFIX_RESERVE].strip('-') or 'post'
+        post.save(update_fields=['slug'])
+
+    duplicated = (
+        Post.objects.values('slug').annotate(n=Count('pk')).filter(n__gt=1).values_list('slug', flat=True)
+    )
+    pending = []
+    for slug in list(duplicated):
+        base = slug[: SLUG_MAX_LENGTH - SUFFIX_RESERVE]
+        taken = set(Post.objects.filter(slug__gte=base, slug__lt=f'{base}.').values_list('slug', flat=True))
+        pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+        used = {int(m[1]) for s in taken if (m := pattern.match(s))}
+        suffix = 2
+        # Keep the oldest row untouched, renumber the rest
+        for post in Post.objects.filter(slug=slug).order_by('pk').only('pk', 'slug')[1:]:
+            while suffix in used:
+                suffix += 1
+            used.add(suffix)
+            post.slug = f'{base}-{suffix}'
+            pending.append(post)
+            if len(pending) >= BATCH_SIZE:
+                Post.objects.bulk_update(pending, ['slug'])
+                pending = []
+    if pending:
+        Post.objects.bulk_update(pending, ['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_slugs, migrations.RunPython.noop),
+    ]
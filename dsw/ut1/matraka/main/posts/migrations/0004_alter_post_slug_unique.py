@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_dedupe_post_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(max_length=256, unique=True),
+        ),
+    ]
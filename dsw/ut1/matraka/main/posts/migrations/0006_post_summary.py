@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:40
+
+import math
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+from ._fts import around_table_rebuild
+
+BATCH_SIZE = 1000
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+
+
+def summarize(content):
+    # Frozen copy of posts.models.summarize
+    words = content.split()
+    return dict(
+        excerpt=Truncator(' '.join(words)).chars(EXCERPT_LENGTH),
+        word_count=len(words),
+        reading_time=math.ceil(len(words) / WORDS_PER_MINUTE),
+    )
+
+
+def backfill_summaries(apps, schema_editor):
+    """Fill the new fields in batches walking the primary key, one bulk_update each."""
+    Post = apps.get_model('posts', 'Post')
+    last_pk = 0
+    while batch := list(Post.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content')[:BATCH_SIZE]):
+        for post in batch:
+            for field, value in summarize(post.content).items():
+                setattr(post, field, value)
+        Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_fts'),
+    ]
+
+    # Adding the columns rebuilds posts_post on SQLite, dropping the FTS triggers
+    operations = around_table_rebuild([
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ])
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from ._fts import around_table_rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_summary'),
+    ]
+
+    # Existing rows have no history to recover: they all get the time of the
+    # migration, set by the column default in the same table rebuild, which
+    # drops the FTS triggers.
+    operations = around_table_rebuild([
+        migrations.AddField(
+            model_name='post',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ])
@@ -0,0 +1,49 @@
+"""Frozen copy of the FTS triggers of 0005_post_fts.
+
+On SQLite, adding or altering a column of posts_post may rebuild the table
+(copy to a new one, drop the old one), and its triggers go with it. The
+migrations that do so recreate them afterwards, and before the rebuild of
+their reverse, so the index stays in step either way. The migration loader
+skips modules starting with an underscore.
+"""
+
+from django.db import migrations
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER posts_post_fts_ai AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_ad AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_au AFTER UPDATE OF title, content ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_au',
+    'DROP TRIGGER IF EXISTS posts_post_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_post_fts_ai',
+]
+
+# Whether or not the rebuild dropped them
+RECREATE_TRIGGERS = DROP_TRIGGERS + TRIGGERS
+
+
+def around_table_rebuild(operations):
+    """``operations`` followed by the triggers again, and preceded by them on the way back."""
+    return [
+        migrations.RunSQL(migrations.RunSQL.noop, RECREATE_TRIGGERS),
+        *operations,
+        migrations.RunSQL(RECREATE_TRIGGERS, migrations.RunSQL.noop),
+    ]
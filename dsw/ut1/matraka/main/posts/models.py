@@ -1,11 +1,51 @@
+import math
+
 from django.db import models
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+WORDS_PER_MINUTE = 200
+SUMMARY_FIELDS = ('excerpt', 'word_count', 'reading_time')
+
+
+def summarize(content: str) -> dict:
+    """Values of the ``SUMMARY_FIELDS`` for a post body."""
+    words = content.split()
+    return dict(
+        # Whitespace collapsed, cut at a word boundary
+        excerpt=Truncator(' '.join(words)).chars(EXCERPT_LENGTH),
+        word_count=len(words),
+        reading_time=math.ceil(len(words) / WORDS_PER_MINUTE),
+    )
 
 
 # Create your models here.
 class Post(models.Model):
     title = models.CharField(max_length=256)
-    slug = models.SlugField(max_length=256)
+    slug = models.SlugField(max_length=256, unique=True)
     content = models.TextField()
+    # Derived from content on save, so list pages never need to load it
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default='', editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False, help_text='Minutes')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'PK={self.pk}: {self.title}'
+
+    def refresh_summary(self):
+        for field, value in summarize(self.content).items():
+            setattr(self, field, value)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # A deferred content isn't loaded, so it isn't being changed either
+        content_saved = update_fields is None or 'content' in update_fields
+        if content_saved and 'content' not in self.get_deferred_fields():
+            self.refresh_summary()
+            if update_fields is not None:
+                update_fields = {*update_fields, *SUMMARY_FIELDS}
+        if update_fields:
+            # Any change must move updated_at, or conditional GETs would miss it
+            update_fields = {*update_fields, 'updated_at'}
+        super().save(*args, update_fields=update_fields, **kwargs)
@@ -0,0 +1,138 @@
+import base64
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None
+    prev_cursor: str | None
+    size: int
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def encode_cursor(values: tuple, direction: str) -> str:
+    payload = json.dumps({'k': list(values), 'd': direction}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, keys: tuple[str, ...], types=None) -> tuple[tuple, str]:
+    """Key values and direction of ``cursor``.
+
+    ``types`` has a converter per key (``int``, a field's ``to_python``...):
+    a value it rejects, or a null, makes the cursor invalid instead of reaching
+    the query.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = tuple(payload['k']), payload['d']
+    except (ValueError, KeyError, TypeError) as err:
+        raise InvalidCursor(cursor) from err
+    if len(values) != len(keys) or direction not in ('next', 'prev'):
+        raise InvalidCursor(cursor)
+    if types is not None:
+        try:
+            values = tuple(convert(value) for convert, value in zip(types, values))
+        except (ValueError, TypeError, ValidationError) as err:
+            raise InvalidCursor(cursor) from err
+    if None in values:
+        raise InvalidCursor(cursor)
+    return values, direction
+
+
+def get_page_size(requested, default: int | None = None, max_size: int | None = None) -> int:
+    default = default or settings.POSTS_PAGE_SIZE
+    max_size = max_size or settings.POSTS_MAX_PAGE_SIZE
+    try:
+        size = int(requested) if requested else default
+    except ValueError:
+        size = default
+    return max(1, min(size, max_size))
+
+
+def _after(keys: tuple[str, ...], values: tuple, descending: bool) -> Q:
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for i, key in enumerate(keys):
+        term = Q(**{f'{key}__{lookup}': values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            term &= Q(**{prev_key: prev_value})
+        condition |= term
+    return condition
+
+
+def _page_queryset(queryset, cursor: str | None, size: int, keys: tuple[str, ...]):
+    ordering = [f'-{key}' for key in keys]
+    if cursor:
+        fields = [queryset.model._meta.get_field(key) for key in keys]
+        values, direction = decode_cursor(cursor, keys, [field.to_python for field in fields])
+        if direction == 'next':
+            queryset = queryset.filter(_after(keys, values, descending=False)).order_by(*keys)
+        else:
+            queryset = queryset.filter(_after(keys, values, descending=True)).order_by(*ordering)
+    else:
+        direction = 'next'
+        queryset = queryset.order_by(*keys)
+    return queryset[: size + 1], direction
+
+
+def paginate(queryset, cursor: str | None, size: int, keys: tuple[str, ...] = ('id',)) -> KeysetPage:
+    """Keyset pagination: every page is a single indexed range scan of ``size + 1`` rows."""
+    queryset, direction = _page_queryset(queryset, cursor, size, keys)
+    return _build_page(list(queryset), direction, cursor, size, keys)
+
+
+def page_aggregate(queryset, cursor: str | None, size: int, keys: tuple[str, ...] = ('id',), **aggregates) -> dict:
+    """``aggregates`` over the rows ``paginate`` would fetch (lookahead row
+    included), computed in the database without loading them."""
+    queryset, _ = _page_queryset(queryset, cursor, size, keys)
+    return queryset.aggregate(**aggregates)
+
+
+def _build_page(rows: list, direction: str, cursor: str | None, size: int, keys: tuple[str, ...]) -> KeysetPage:
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if direction == 'next':
+        # Coming from a cursor means there is something behind us.
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+
+    def key_of(obj):
+        # Model instances, or dicts from .values()
+        if isinstance(obj, dict):
+            return tuple(obj[key] for key in keys)
+        return tuple(getattr(obj, key) for key in keys)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_next:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+        if has_prev:
+            prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+    return KeysetPage(rows, next_cursor, prev_cursor, size)
@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from .pagination import KeysetPage, decode_cursor, encode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+# Matches in the title weigh more than matches in the body
+TITLE_WEIGHT, CONTENT_WEIGHT = 10.0, 1.0
+SNIPPET_TOKENS = 16
+# Control characters can't appear in a post, so they are safe markers to
+# wrap matches with before HTML-escaping the snippet.
+MARK_START, MARK_END = '\x02', '\x03'
+
+SEARCH_SQL = f"""
+SELECT p.id, p.slug, p.title,
+       highlight({FTS_TABLE}, 0, %s, %s),
+       snippet({FTS_TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}),
+       bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score
+FROM {FTS_TABLE}
+JOIN posts_post p ON p.id = {FTS_TABLE}.rowid
+WHERE {FTS_TABLE} MATCH %s {{after}}
+ORDER BY score, p.id
+LIMIT %s
+"""
+
+
+@dataclass
+class SearchResult:
+    id: int
+    slug: str
+    title: str
+    title_html: SafeString
+    snippet_html: SafeString
+    score: float
+
+
+def to_match_expression(query: str, prefix: bool = False) -> str:
+    """Turn free text into an FTS5 query: every word quoted, all of them required.
+
+    Quoting keeps user input from being parsed as FTS5 syntax (AND, NEAR, ``*``,
+    column filters...), which would otherwise raise on stray quotes or brackets.
+    With ``prefix`` words also match longer tokens (``"dja"*`` finds django).
+    """
+    terms = re.findall(r'\w+', query)
+    star = '*' if prefix else ''
+    return ' '.join('"{}"{}'.format(term.replace('"', '""'), star) for term in terms)
+
+
+def matching_ids(query: str, column: str | None = None, prefix: bool = False) -> RawSQL | None:
+    """Ids of the posts matching ``query`` as a subquery for ``pk__in``, or None
+    if there is nothing to search for. ``column`` limits the match to it."""
+    match = to_match_expression(query, prefix)
+    if not match:
+        return None
+    if column is not None:
+        match = f'{column} : ({match})'
+    return RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+
+
+def _highlight(fragment: str) -> SafeString:
+    html = escape(fragment).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def search_posts(query: str, cursor: str | None, size: int) -> KeysetPage:
+    """bm25-ranked full-text search, paged with a (score, id) keyset cursor."""
+    match = to_match_expression(query)
+    if not match:
+        return KeysetPage([], None, None, size)
+
+    params = [MARK_START, MARK_END, MARK_START, MARK_END, match]
+    after = ''
+    if cursor:
+        (score, pk), _ = decode_cursor(cursor, ('score', 'id'), (float, int))
+        after = f'AND (bm25({FTS_TABLE}, {TITLE_WEIGHT}, {CONTENT_WEIGHT}), p.id) > (%s, %s)'
+        params += [score, pk]
+    params.append(size + 1)
+
+    with connection.cursor() as db:
+        db.execute(SEARCH_SQL.format(after=after), params)
+        rows = db.fetchall()
+
+    results = [
+        SearchResult(pk, slug, title, _highlight(title_html), _highlight(snippet), score)
+        for pk, slug, title, title_html, snippet, score in rows[:size]
+    ]
+    next_cursor = None
+    if len(rows) > size:
+        last = results[-1]
+        next_cursor = encode_cursor((last.score, last.id), 'next')
+    return KeysetPage(results, next_cursor, None, size)
+
+
+def rebuild_index():
+    with connection.cursor() as db:
+        db.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def optimize_index():
+    with connection.cursor() as db:
+        db.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
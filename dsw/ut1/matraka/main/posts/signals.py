@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import Post
+
+
+@receiver(post_init, sender=Post)
+def remember_slug(sender, instance, **kwargs):
+    # __dict__ so a deferred slug is never fetched just for this
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, created, **kwargs):
+    slugs = {instance.slug, instance._loaded_slug}
+    transaction.on_commit(lambda: cache.invalidate_post(instance.pk, slugs, tail=created))
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    pk, slugs = instance.pk, {instance.slug, instance._loaded_slug}
+    transaction.on_commit(lambda: cache.invalidate_post(pk, slugs, tail=True))
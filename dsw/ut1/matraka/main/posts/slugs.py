@@ -0,0 +1,116 @@
+import re
+from contextlib import nullcontext
+
+from django.db import IntegrityError, connection, transaction
+from django.utils.text import slugify
+
+from .models import Post
+
+SLUG_MAX_LENGTH = Post._meta.get_field('slug').max_length
+# Room left for a '-<n>' suffix when the base slug is truncated
+SUFFIX_RESERVE = 8
+
+
+def base_slug(title: str) -> str:
+    return slugify(title)[: SLUG_MAX_LENGTH - SUFFIX_RESERVE].strip('-') or 'post'
+
+
+def next_free_slug(base: str, taken: set[str]) -> str:
+    """Return ``base`` or the smallest free ``base-<n>`` (n >= 2) not in ``taken``."""
+    if base not in taken:
+        return base
+    pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    used = {int(m[1]) for slug in taken if (m := pattern.match(slug))}
+    suffix = 2
+    while suffix in used:
+        suffix += 1
+    return f'{base}-{suffix}'
+
+
+def sibling_slugs(base: str, exclude_pk=None) -> set[str]:
+    """All stored slugs that could collide with ``base``, fetched with a single prefix query."""
+    # A range instead of LIKE 'base-%' so SQLite can walk the unique index
+    # ('.' is the character right after '-').
+    siblings = Post.objects.filter(slug__gte=base, slug__lt=f'{base}.')
+    if exclude_pk is not None:
+        siblings = siblings.exclude(pk=exclude_pk)
+    return set(siblings.values_list('slug', flat=True))
+
+
+def unique_slug(title: str, exclude_pk=None) -> str:
+    base = base_slug(title)
+    return next_free_slug(base, sibling_slugs(base, exclude_pk))
+
+
+def save_with_unique_slug(post: Post, attempts: int = 3) -> Post:
+    """Assign a free slug and save; retry if a concurrent writer took it first.
+
+    The sibling lookup and the write are separate statements and the unique
+    index has the last word. Under the default (deferred) transactions, a
+    transaction around both fails with "database is locked" under concurrent
+    writers, without waiting for busy_timeout; a single autocommit INSERT waits.
+    """
+    for attempt in range(attempts):
+        post.slug = unique_slug(post.title, exclude_pk=post.pk)
+        # Inside a caller's transaction, a savepoint keeps a collision from
+        # breaking it; on its own the save stays one autocommit statement.
+        savepoint = transaction.atomic() if connection.in_atomic_block else nullcontext()
+        try:
+            with savepoint:
+                post.save()
+            return post
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+class SlugAllocator:
+    """Hands out unique slugs for many posts at once (bulk inserts).
+
+    Sibling slugs are loaded for a whole batch of base slugs per query and
+    kept in memory, so allocating N slugs costs ~N / LOOKUP_BATCH queries.
+    """
+
+    LOOKUP_BATCH = 100
+
+    def __init__(self):
+        self.taken: dict[str, set[str]] = {}
+        # Next suffix worth trying per base, so repeated titles stay O(1)
+        self.hints: dict[str, int] = {}
+
+    def _load(self, bases: list[str]):
+        for i in range(0, len(bases), self.LOOKUP_BATCH):
+            chunk = bases[i : i + self.LOOKUP_BATCH]
+            params = []
+            for base in chunk:
+                self.taken[base] = set()
+                params += [base, f'{base}.']
+            # Plain SQL: building 100 ORed range filters through the ORM costs
+            # more than running the query itself.
+            ranges = ' OR '.join(['(slug >= %s AND slug < %s)'] * len(chunk))
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT slug FROM {Post._meta.db_table} WHERE {ranges}', params)
+                rows = cursor.fetchall()
+            for (slug,) in rows:
+                # Only 'base' and 'base-<n>' can ever collide
+                if slug in self.taken:
+                    self.taken[slug].add(slug)
+                head, _, tail = slug.rpartition('-')
+                if tail.isdigit() and head in self.taken:
+                    self.taken[head].add(slug)
+
+    def allocate(self, titles: list[str]) -> list[str]:
+        bases = [base_slug(title) for title in titles]
+        self._load([base for base in dict.fromkeys(bases) if base not in self.taken])
+        slugs = []
+        for base in bases:
+            taken = self.taken[base]
+            slug = base
+            if slug in taken:
+                suffix = self.hints.get(base, 2)
+                while (slug := f'{base}-{suffix}') in taken:
+                    suffix += 1
+                self.hints[base] = suffix + 1
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
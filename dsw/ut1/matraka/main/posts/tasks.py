@@ -0,0 +1,19 @@
+"""Heavy posts operations as background jobs (``shared.jobs.enqueue``)."""
+
+from pathlib import Path
+
+from django.core.management import call_command
+
+
+def import_posts(path: str, format: str | None = None):
+    """Bulk import of an uploaded file, deleted once imported."""
+    call_command('import_posts', path, format=format)
+    Path(path).unlink(missing_ok=True)
+
+
+def rebuild_search_index(optimize: bool = False):
+    call_command('rebuild_search_index', optimize=optimize)
+
+
+def backfill_post_summaries(missing: bool = False):
+    call_command('backfill_post_summaries', missing=missing)
@@ -1,3 +1,395 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import warnings
+import zlib
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from shared import jobs
+from shared.models import Job
+
+from . import cache, views
+from .models import EXCERPT_LENGTH, Post
+from .pagination import InvalidCursor, encode_cursor, paginate
+from .search import search_posts
+from .slugs import SlugAllocator, save_with_unique_slug, unique_slug
+
+
+def import_two_per_chunk(path: str):
+    call_command('import_posts', path, chunk_size=2, batch_size=2, stdout=io.StringIO(), stderr=io.StringIO())
+
+
+def found(query: str) -> list[int]:
+    return [result.id for result in search_posts(query, None, 10)]
+
+
+class SearchTests(TestCase):
+    def test_new_post_is_found(self):
+        post = Post.objects.create(title='Zoo news', slug='zoo-news', content='A giraffe was born')
+        self.assertEqual(found('giraffe'), [post.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(title='Zoo news', slug='zoo-news', content='A giraffe was born')
+        post.content = 'An okapi was born'
+        post.save()
+        self.assertEqual(found('giraffe'), [])
+        self.assertEqual(found('okapi'), [post.pk])
+        post.delete()
+        self.assertEqual(found('okapi'), [])
+
+
+class AdminDeleteSelectedTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin-password'))
+        self.posts = [Post.objects.create(title=f'Post {n}', slug=f'post-{n}', content='text') for n in range(5)]
+
+    @mock.patch('posts.admin.DELETE_BATCH_SIZE', 2)
+    def test_deletes_in_batches_and_invalidates(self):
+        doomed, kept = self.posts[:4], self.posts[4]
+        versions = cache.get_versions([post.pk for post in self.posts])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post('/admin/posts/post/', {
+                'action': 'delete_selected',
+                '_selected_action': [post.pk for post in doomed],
+                'post': 'yes',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Post.objects.all()), [kept])
+        self.assertEqual(len(callbacks), 2)
+        after = cache.get_versions([post.pk for post in self.posts])
+        for post in doomed:
+            self.assertNotEqual(after[cache.version_key(post.pk)], versions[cache.version_key(post.pk)])
+        self.assertEqual(after[cache.version_key(kept.pk)], versions[cache.version_key(kept.pk)])
+
+
+class CacheVersionTests(TestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+
+    def test_evicted_version_never_comes_back(self):
+        key = cache.version_key(1)
+        before = cache.get_versions([1])[key]
+        cache.get_cache().delete(key)
+        self.assertNotEqual(cache.get_versions([1])[key], before)
+
+    def test_version_stored_meanwhile_wins(self):
+        # A bump lands between the read of the missing versions and their add
+        backend = cache.get_cache()
+        backend.set(cache.version_key(2), 42, timeout=None)
+        with mock.patch.object(backend, 'get_many', side_effect=[{}, {cache.version_key(2): 42}]) as get_many:
+            versions = cache.get_versions([1, 2])
+        self.assertEqual(versions[cache.version_key(2)], 42)
+        self.assertEqual(backend.get(cache.version_key(1)), versions[cache.version_key(1)])
+        self.assertEqual(get_many.call_args.args[0], [cache.version_key(2)])
+
+    def test_stats_are_written_once_per_interval(self):
+        cache.reset_stats()
+        with mock.patch.object(cache, 'STATS_FLUSH_INTERVAL', 3600):
+            cache.record('detail', True)
+            with mock.patch.object(cache.get_cache(), 'incr') as incr, \
+                    mock.patch.object(cache.get_cache(), 'add') as add:
+                for _ in range(3):
+                    cache.record('detail', True)
+            incr.assert_not_called()
+            add.assert_not_called()
+            self.assertEqual(cache.stats()['detail'], dict(hits=4, misses=0))
+
+    def test_import_clears_cached_missing_slug(self):
+        self.assertIsNone(cache.get_post('zoo-news'))
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as source:
+            source.write(json.dumps({'title': 'Zoo news', 'content': 'A giraffe was born'}) + '\n')
+            source.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('import_posts', source.name, stdout=io.StringIO())
+        self.assertEqual(cache.get_post('zoo-news').title, 'Zoo news')
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        imports = tempfile.TemporaryDirectory()
+        self.addCleanup(imports.cleanup)
+        self.settings = override_settings(POSTS_IMPORT_DIR=Path(imports.name))
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.staff = User.objects.create_user('staff', password='staff-password', is_staff=True)
+
+    def write_source(self, titles) -> str:
+        path = settings.POSTS_IMPORT_DIR / 'source.ndjson'
+        path.write_text(''.join(json.dumps({'title': title, 'content': 'text'}) + '\n' for title in titles))
+        return str(path)
+
+    def test_retry_resumes_after_the_committed_chunks(self):
+        job = jobs.enqueue(import_two_per_chunk, dict(path=self.write_source(f'Post {n}' for n in range(5))))
+        bulk_create = Post.objects.bulk_create
+
+        def second_chunk_fails(posts, **kwargs):
+            if Post.objects.exists():
+                raise DatabaseError('disk I/O error')
+            return bulk_create(posts, **kwargs)
+
+        jobs.claim(1, 'worker')
+        with mock.patch.object(Post.objects, 'bulk_create', side_effect=second_chunk_fails):
+            jobs.execute(job.pk, 'worker')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (Job.Status.QUEUED, 2))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.claim(1, 'worker')
+        jobs.execute(job.pk, 'worker')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (Job.Status.DONE, 5))
+        self.assertEqual(sorted(Post.objects.values_list('title', flat=True)), [f'Post {n}' for n in range(5)])
+
+    def test_import_and_its_status_need_the_submitter(self):
+        upload = SimpleUploadedFile('posts.ndjson', b'{"title": "Zoo news", "content": "text"}\n')
+        response = self.client.post('/posts/import/', {'file': upload})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Job.objects.exists())
+
+        self.client.force_login(self.staff)
+        upload.seek(0)
+        status_url = self.client.post('/posts/import/', {'file': upload})['Location']
+        self.assertEqual(self.client.get(status_url).json()['status'], Job.Status.QUEUED)
+        self.client.force_login(User.objects.create_user('other', password='other-password', is_staff=True))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(status_url).status_code, 302)
+
+
+class QueryBudgetTests(TestCase):
+    """Queries per page, with a cold cache, must not grow with the posts on it."""
+
+    # url, queries
+    budgets = (
+        ('/posts/?size=100', 2),
+        ('/posts/api/?size=100', 2),
+        ('/posts/post-1/', 1),
+        ('/posts/api/post-1/', 1),
+        ('/posts/search/?q=giraffe', 1),
+        ('/posts/export/?format=ndjson', 1),
+    )
+
+    def test_pages_within_budget_at_10_and_100_posts(self):
+        for size in (10, 100):
+            Post.objects.bulk_create(
+                Post(title=f'Post {n}', slug=f'post-{n}', content='A giraffe was born')
+                for n in range(Post.objects.count(), size)
+            )
+            for url, queries in self.budgets:
+                with self.subTest(url=url, posts=size):
+                    cache.get_cache().clear()
+                    with self.assertNumQueries(queries):
+                        response = self.client.get(url)
+                        if response.streaming:
+                            b''.join(response.streaming_content)
+                    self.assertEqual(response.status_code, 200)
+
+
+class SummaryTests(TestCase):
+    def test_refresh_summary(self):
+        post = Post(title='Zoo news', content='A  giraffe\nwas born. ' + 'Again ' * 400)
+        post.refresh_summary()
+        self.assertEqual((post.word_count, post.reading_time), (404, 3))
+        self.assertTrue(post.excerpt.startswith('A giraffe was born. Again'))
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH)
+
+    def test_backfill_updates_cached_lookups(self):
+        cache.get_cache().clear()
+        Post.objects.create(title='Zoo news', slug='zoo-news', content='A giraffe was born')
+        # Written behind the model's back, like raw SQL would
+        Post.objects.update(excerpt='', word_count=0, reading_time=0)
+        self.assertEqual(cache.get_post('zoo-news').word_count, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_post_summaries', '--missing', stdout=io.StringIO())
+        post = cache.get_post('zoo-news')
+        self.assertEqual((post.excerpt, post.word_count, post.reading_time), ('A giraffe was born', 4, 1))
+
+    def test_list_pages_never_read_content(self):
+        for n in range(3):
+            Post.objects.create(title=f'Post {n}', slug=f'post-{n}', content='A giraffe was born')
+        for url in ('/posts/', '/posts/api/'):
+            with self.subTest(url=url):
+                cache.get_cache().clear()
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertContains(self.client.get(url), 'A giraffe was born')
+                self.assertFalse([query for query in queries if '"content"' in query['sql']])
+
+
+class SlugTests(TestCase):
+    def test_taken_slugs_get_the_next_free_suffix(self):
+        first = save_with_unique_slug(Post(title='Zoo news', content='text'))
+        second = save_with_unique_slug(Post(title='Zoo news', content='text'))
+        self.assertEqual([first.slug, second.slug], ['zoo-news', 'zoo-news-2'])
+        self.assertEqual(SlugAllocator().allocate(['Zoo news', 'Zoo news']), ['zoo-news-3', 'zoo-news-4'])
+
+    def test_retries_when_another_writer_took_the_slug(self):
+        Post.objects.create(title='Zoo news', slug='zoo-news', content='text')
+        # The first lookup misses the concurrent insert, the second one sees it
+        with mock.patch('posts.slugs.unique_slug', side_effect=['zoo-news', 'zoo-news-2']):
+            post = save_with_unique_slug(Post(title='Zoo news', content='text'))
+        self.assertEqual(post.slug, 'zoo-news-2')
+
+    def test_gives_up_after_the_last_attempt(self):
+        Post.objects.create(title='Zoo news', slug='zoo-news', content='text')
+        with mock.patch('posts.slugs.unique_slug', return_value='zoo-news'):
+            with self.assertRaises(IntegrityError):
+                save_with_unique_slug(Post(title='Zoo news', content='text'), attempts=2)
+
+    def test_edit_keeps_own_slug(self):
+        post = Post.objects.create(title='Zoo news', slug='zoo-news', content='text')
+        self.assertEqual(unique_slug('Zoo news', exclude_pk=post.pk), 'zoo-news')
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.posts = [Post.objects.create(title=f'Post {n}', slug=f'post-{n}', content='text') for n in range(5)]
+
+    def test_walks_forward_and_back(self):
+        first = paginate(Post.objects.all(), None, 2)
+        self.assertEqual(list(first), self.posts[:2])
+        self.assertFalse(first.has_prev)
+        second = paginate(Post.objects.all(), first.next_cursor, 2)
+        self.assertEqual(list(second), self.posts[2:4])
+        last = paginate(Post.objects.all(), second.next_cursor, 2)
+        self.assertEqual(list(last), self.posts[4:])
+        self.assertFalse(last.has_next)
+        self.assertEqual(list(paginate(Post.objects.all(), second.prev_cursor, 2)), self.posts[:2])
+
+    def test_api_pages_follow_next(self):
+        slugs, cursor = [], ''
+        while cursor is not None:
+            data = self.client.get('/posts/api/', {'size': 2, 'cursor': cursor, 'fields': 'slug'}).json()
+            slugs += [row['slug'] for row in data['results']]
+            cursor = data['next']
+        self.assertEqual(slugs, [post.slug for post in self.posts])
+
+    def test_bad_cursors(self):
+        cursors = [
+            'not-base64!',
+            encode_cursor((1, 2), 'next'),
+            encode_cursor((1,), 'sideways'),
+            # Well formed, but not an id
+            *(encode_cursor((value,), 'next') for value in ('abc', None, [1], {'a': 1})),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    paginate(Post.objects.all(), cursor, 2)
+                self.assertEqual(self.client.get('/posts/', {'cursor': cursor}).status_code, 400)
+                self.assertEqual(self.client.get('/posts/api/', {'cursor': cursor}).status_code, 400)
+
+    def test_bad_search_cursors(self):
+        for values in (('abc', 1), (None, None), ([1], 2), (1.5, 'abc')):
+            with self.subTest(values=values):
+                response = self.client.get('/posts/search/', {'q': 'post', 'cursor': encode_cursor(values, 'next')})
+                self.assertEqual(response.status_code, 400)
+
+
+class PostEditTestCase(TestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        self.post = Post.objects.create(title='Zoo news', slug='zoo-news', content='A giraffe was born')
+
+    def edit(self, **data):
+        # Invalidation waits for the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/posts/zoo-news/edit/', {'title': self.post.title, 'content': self.post.content, **data}
+            )
+        self.assertEqual(response.status_code, 302)
+
+
+class PageCacheTests(PostEditTestCase):
+    def test_edit_invalidates_detail(self):
+        self.assertEqual(self.client.get('/posts/zoo-news/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/posts/zoo-news/')['X-Cache'], 'HIT')
+        self.edit(content='An okapi was born')
+        response = self.client.get('/posts/zoo-news/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'okapi')
+
+    def test_edit_invalidates_list(self):
+        self.client.get('/posts/')
+        self.assertEqual(self.client.get('/posts/')['X-Cache'], 'HIT')
+        self.edit(title='Okapi news')
+        response = self.client.get('/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Okapi news')
+        self.assertNotContains(response, 'Zoo news')
+
+
+class FragmentCacheTests(PostEditTestCase):
+    def test_edit_renders_only_the_edited_item_again(self):
+        Post.objects.create(title='Other news', slug='other-news', content='A lion was born')
+        self.client.get('/posts/')
+        with mock.patch('posts.views.render_item', wraps=views.render_item) as render_item:
+            self.edit(content='An okapi was born')
+            response = self.client.get('/posts/')
+        self.assertEqual([call.args[0].pk for call in render_item.call_args_list], [self.post.pk])
+        self.assertContains(response, 'An okapi was born')
+        self.assertContains(response, 'A lion was born')
+
+
+class ConditionalGetTests(PostEditTestCase):
+    def test_not_modified_until_edited(self):
+        for url in ('/posts/', '/posts/zoo-news/', '/posts/api/', '/posts/api/zoo-news/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        etag = self.client.get('/posts/zoo-news/')['ETag']
+        self.edit(content='An okapi was born')
+        self.assertEqual(self.client.get('/posts/zoo-news/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.posts = [Post.objects.create(title=f'Post {n}', slug=f'post-{n}', content='text') for n in range(3)]
+
+    def export(self, **params) -> str:
+        response = self.client.get('/posts/export/', params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_after(self):
+        rows = [json.loads(line) for line in self.export(format='ndjson', after=self.posts[0].pk).splitlines()]
+        self.assertEqual(rows, [
+            dict(id=post.pk, title=post.title, slug=post.slug, content=post.content) for post in self.posts[1:]
+        ])
+
+    def test_csv(self):
+        lines = self.export(format='csv').splitlines()
+        self.assertEqual(lines[0], 'id,title,slug,content')
+        self.assertEqual(lines[1:], [f'{post.pk},{post.title},{post.slug},text' for post in self.posts])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/posts/export/', {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/posts/export/', {'after': 'x'}).status_code, 400)
+
+    def test_gzip_follows_accept_encoding(self):
+        response = self.client.get('/posts/export/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = zlib.decompress(b''.join(response.streaming_content), 31).decode()
+        self.assertEqual(body, self.export(format='ndjson'))
+        for refused in ('gzip;q=0', 'br', 'gzip;q=0, *'):
+            with self.subTest(accept_encoding=refused):
+                response = self.client.get('/posts/export/', HTTP_ACCEPT_ENCODING=refused)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    async def test_asgi_streams_rows_as_they_are_read(self):
+        response = await self.async_client.get('/posts/export/', {'format': 'csv'})
+        self.assertTrue(response.is_async)
+        with warnings.catch_warnings():
+            # Django warns when it has to read a sync iterator to the end first
+            warnings.simplefilter('error')
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(body.splitlines()[1:], [f'{post.pk},{post.title},{post.slug},text' for post in self.posts])
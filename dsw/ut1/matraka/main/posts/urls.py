@@ -1,12 +1,21 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
 
 app_name = 'posts'
 
+# The ASGI profile serves the native async views, WSGI keeps the sync ones
+page_views = async_views if settings.POSTS_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.post_list, name='post-list'),
-    path('add/', views.add_post, name='add-post'),
-    path('edit/', views.edit_post, name='edit-post'),
-    path('<slug:post_slug>/', views.post_detail, name='post-detail'),
+    path('', page_views.post_list, name='post-list'),
+    path('add/', page_views.add_post, name='add-post'),
+    path('search/', views.post_search, name='post-search'),
+    path('export/', views.post_export, name='post-export'),
+    path('import/', views.import_posts, name='import-posts'),
+    path('api/', api.post_list, name='api-post-list'),
+    path('api/<slug:post_slug>/', api.post_detail, name='api-post-detail'),
+    path('<slug:post_slug>/', page_views.post_detail, name='post-detail'),
+    path('<slug:post_slug>/edit/', page_views.edit_post, name='edit-post'),
 ]
@@ -1,45 +1,196 @@
-from django.http import HttpResponse
+import hashlib
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max, Min
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
-from django.utils.text import slugify
+from django.template.loader import get_template, render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from shared import jobs
+from shared.sessions import sessionless
+from shared.staticfiles import choose_encoding
 
+from . import cache, tasks
+from .export import CONTENT_TYPES, aexport_chunks, export_chunks
 from .forms import AddPostForm, EditPostForm
 from .models import Post
+from .pagination import InvalidCursor, get_page_size, page_aggregate, paginate
+from .search import search_posts
+from .slugs import save_with_unique_slug
+
+# What a list page depends on, in one aggregate over its id range
+LIST_AGGREGATES = dict(count=Count('id'), first=Min('id'), last=Max('id'), updated=Max('updated_at'))
 
 
 def add_post(request):
     if request.method == 'POST':
         if (form := AddPostForm(request.POST)).is_valid():
             post = form.save(commit=False)
-            post.slug = slugify(post.title)
-            post.save()
+            save_with_unique_slug(post)
             return redirect('posts:post-list')
     else:
         form = AddPostForm()
     return render(request, 'posts/post/add.html', dict(form=form))
 
 
+@staff_member_required
+def import_posts(request):
+    """Upload an NDJSON or CSV file for ``import_posts``; the import runs as a
+    background job and the response (202) points at its status."""
+    if request.method != 'POST':
+        return render(request, 'posts/post/import.html')
+    if (upload := request.FILES.get('file')) is None:
+        return HttpResponseBadRequest('Missing "file"')
+    fmt = 'csv' if upload.name.endswith('.csv') else 'ndjson'
+    settings.POSTS_IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = settings.POSTS_IMPORT_DIR / f'{uuid.uuid4().hex}.{fmt}'
+    with open(path, 'wb') as destination:
+        for chunk in upload.chunks():
+            destination.write(chunk)
+    job = jobs.enqueue(tasks.import_posts, dict(path=str(path), format=fmt), created_by=request.user)
+    status_url = reverse('shared:job-status', args=[job.pk])
+    response = JsonResponse(dict(job=job.pk, status=status_url), status=202)
+    response['Location'] = status_url
+    return response
+
+
 def edit_post(request, post_slug: str):
-    post = Post.objects.get(slug=post_slug)
+    try:
+        post = Post.objects.get(slug=post_slug)
+    except Post.DoesNotExist:
+        return HttpResponse(f'Post with slug "{post_slug}" does not exist!')
     if request.method == 'POST':
         if (form := EditPostForm(request.POST, instance=post)).is_valid():
             post = form.save(commit=False)
-            post.slug = slugify(post.title)
-            post.save()
+            if 'title' in form.changed_data:
+                save_with_unique_slug(post)
+            else:
+                post.save()
             return redirect('posts:post-list')
     else:
         form = EditPostForm(instance=post)
-    return render(request, 'posts/edit_post.html', dict(post=post, form=form))
+    return render(request, 'posts/post/edit.html', dict(post=post, form=form))
 
 
+@sessionless
 def post_list(request):
-    posts = Post.objects.all()
+    size = get_page_size(request.GET.get('size'))
+    cursor = request.GET.get('cursor')
+    try:
+        meta = page_aggregate(Post.objects.all(), cursor, size, **LIST_AGGREGATES)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    etag, last_modified = list_validators(meta, cursor, size)
+    if (response := not_modified(request, etag, last_modified)) is not None:
+        return response
+
+    def render_page():
+        # Title, excerpt and counters only: content can be megabytes per post
+        page = paginate(Post.objects.defer('content'), cursor, size)
+        cache.render_items(page.object_list, render_item)
+        html = render_to_string('posts/post/list.html', {'posts': page.object_list, 'page': page}, request)
+        return html, [post.pk for post in page], not page.has_next
 
-    return render(request, 'posts/post/list.html', {'posts': posts})
+    try:
+        html, hit = cache.cached_list(cursor, size, render_page)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return with_validators(cached_response(html, hit), etag, last_modified)
 
 
+@sessionless
 def post_detail(request, post_slug: str):
-    try:
-        post = Post.objects.get(slug=post_slug)
-    except Post.DoesNotExist:
+    if (post := cache.get_post(post_slug)) is None:
         return HttpResponse(f'Post with slug "{post_slug}" does not exist!')
-    return request('posts/post/detail.html', {'post': post})
+    etag, last_modified = detail_validators(post)
+    if (response := not_modified(request, etag, last_modified)) is not None:
+        return response
+    html, hit = cache.cached_detail(
+        post, lambda: render_to_string('posts/post/detail.html', {'post': post}, request)
+    )
+    return with_validators(cached_response(html, hit), etag, last_modified)
+
+
+def render_item(post: Post) -> str:
+    """A post as list pages show it; cached by posts.cache.render_items."""
+    # Nothing request-specific in it, so it can be shared by every page
+    return get_template('posts/post/item.html').render({'post': post})
+
+
+def cached_response(html: str, hit: bool) -> HttpResponse:
+    response = HttpResponse(html)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from everything a response depends on."""
+    fingerprint = '|'.join(map(str, parts))
+    return quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+
+
+def list_validators(meta: dict, cursor: str | None, size: int) -> tuple[str, datetime | None]:
+    """ETag and Last-Modified of a list page from its ``LIST_AGGREGATES``."""
+    # list.html prints today's date, so the day is part of the page as well
+    return make_etag(cursor, size, *meta.values(), timezone.localdate()), meta['updated']
+
+
+def detail_validators(post: Post) -> tuple[str, datetime]:
+    return quote_etag(f'{post.pk}-{post.updated_at:%Y%m%d%H%M%S%f}'), post.updated_at
+
+
+def not_modified(request, etag: str, last_modified: datetime | None) -> HttpResponse | None:
+    """304 (or 412) answer to a conditional request, before any rendering."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    if (response := get_conditional_response(request, etag=etag, last_modified=timestamp)) is not None:
+        return with_validators(response, etag, last_modified)
+    return None
+
+
+def with_validators(response: HttpResponse, etag: str, last_modified: datetime | None) -> HttpResponse:
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Stored, but revalidated on every use: edits show up at once
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+@sessionless
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    size = get_page_size(request.GET.get('size'))
+    try:
+        page = search_posts(query, request.GET.get('cursor'), size)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(request, 'posts/post/search.html', {'query': query, 'results': page.object_list, 'page': page})
+
+
+@sessionless
+def post_export(request):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in CONTENT_TYPES:
+        return HttpResponseBadRequest(f'Unknown format "{fmt}"')
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        return HttpResponseBadRequest('"after" must be a post id')
+    compress = choose_encoding(request.headers.get('Accept-Encoding', ''), ('gzip',)) == 'gzip'
+
+    # Under ASGI the rows are read with aiterator(), chunk by chunk
+    stream = aexport_chunks if isinstance(request, ASGIRequest) else export_chunks
+    response = StreamingHttpResponse(stream(fmt, after, gzip=compress), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="posts.{fmt}"'
+    response['Vary'] = 'Accept-Encoding'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -1,3 +1,38 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
+from . import jobs
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'progress_display', 'attempts', 'run_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task',)
+    ordering = ('-pk',)
+    show_full_result_count = False
+    actions = ('retry',)
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='progress')
+    def progress_display(self, job):
+        done = f'{job.progress}/{job.total}' if job.total else str(job.progress or '')
+        return ' · '.join(filter(None, [done, job.message]))
+
+    @admin.action(description='Run selected jobs again', permissions=['delete'])
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=Job.Status.RUNNING).update(
+            status=Job.Status.QUEUED, attempts=0, run_at=timezone.now(), error='', finished_at=None
+        )
+        self.message_user(request, f'{count} jobs queued again.', messages.SUCCESS)
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = dict(extra_context or {}, stats=jobs.queue_stats())
+        return super().changelist_view(request, extra_context)
@@ -0,0 +1,47 @@
+"""ASGI handler that runs the sync code of all requests on a fixed set of threads.
+
+Django runs every request in a ``ThreadSensitiveContext`` of its own, and each
+of those gets its own thread for the sync parts of the request (most
+middleware, sync views, the ORM, the cache). With 100 slow clients in flight
+that is 100 threads, created and joined once per request.
+
+``ASGIHandler`` keeps ``settings.ASGI_THREADS`` contexts instead, "lanes" that
+live as long as the process, and puts each request on the one with the fewest
+requests. Requests on a lane take turns on its thread, and only while they
+run sync code: a request waiting for its client holds a coroutine, not the
+thread. Like the thread pool of a WSGI server, minus the slow clients.
+"""
+
+import django
+from asgiref.sync import SyncToAsync, ThreadSensitiveContext
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler as DjangoASGIHandler
+
+
+class ASGIHandler(DjangoASGIHandler):
+    def __init__(self, threads: int):
+        super().__init__()
+        self.lanes = {ThreadSensitiveContext(): 0 for _ in range(threads)}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f'Django can only handle ASGI/HTTP connections, not {scope["type"]}.')
+        lane = min(self.lanes, key=self.lanes.__getitem__)
+        self.lanes[lane] += 1
+        # What ``async with ThreadSensitiveContext()`` does, minus shutting
+        # down the thread on the way out
+        token = SyncToAsync.thread_sensitive_context.set(lane)
+        try:
+            await self.handle(scope, receive, send)
+        finally:
+            SyncToAsync.thread_sensitive_context.reset(token)
+            self.lanes[lane] -= 1
+
+
+def get_asgi_application():
+    """``django.core.asgi.get_asgi_application`` with the lanes of ``ASGIHandler``,
+    or Django's own handler (a thread per request) if ``ASGI_THREADS`` is None."""
+    django.setup(set_prefix=False)
+    if settings.ASGI_THREADS is None:
+        return DjangoASGIHandler()
+    return ASGIHandler(settings.ASGI_THREADS)
@@ -0,0 +1,266 @@
+"""Cache backend shared by every worker process of one host: a SQLite file.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'shared.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/matraka-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 50_000, 'MAX_BYTES': 256 * 1024 * 1024},
+        }
+    }
+
+Unlike locmem, an entry written by one process is seen by all of them, and
+memory isn't multiplied by the number of workers: hot pages sit in the OS
+page cache (memory-mapped), once. The file is its own database in WAL mode,
+so readers never wait for writers, and cache writes never compete with the
+project database for its write lock.
+
+- Bounded: over ``MAX_ENTRIES`` entries or ``MAX_BYTES`` of values, expired
+  entries go first, then the least recently used ones (``CULL_FREQUENCY``
+  as in Django's backends: 3 drops a third). Sizes are checked every
+  ``CHECK_EVERY`` writes of a process, so the cache can go over its bounds
+  by that much for a moment.
+- LRU: reads record the access time, at most once per ``LRU_RESOLUTION``
+  seconds per entry, so a hot entry doesn't turn every read into a write.
+  That write is best effort: it is skipped, without waiting, while another
+  connection holds the write lock.
+- Atomic: ``add``, ``incr``/``decr`` and ``get_or_set`` are single
+  statements or ``BEGIN IMMEDIATE`` transactions. ``add_many``, an addition
+  to Django's API, adds many keys in one. All callers of
+  ``get_or_set`` get the value that was actually stored. Integers are stored
+  as SQLite integers so ``incr`` happens in SQL.
+"""
+
+import itertools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Writes of a process between two size checks
+CHECK_EVERY = 64
+# Seconds: a read only records its access time if the last one is older
+LRU_RESOLUTION = 1.0
+NEVER = float('inf')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+"""
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    # A cache can lose its last writes on a power cut
+    'synchronous': 'OFF',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', 0)) or None
+        self._local = threading.local()
+        # Writes of this process; next() on a count is atomic across threads
+        self._writes = itertools.count(1)
+
+    # Connections are per thread, and per process: never used across a fork
+    def _connection(self, name: str = 'db', busy_timeout: int = PRAGMAS['busy_timeout']) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.__dict__.clear()
+            local.pid = os.getpid()
+        if (db := getattr(local, name, None)) is None:
+            db = sqlite3.connect(self.path, timeout=busy_timeout / 1000, isolation_level=None)
+            for pragma, value in {**PRAGMAS, 'busy_timeout': busy_timeout}.items():
+                db.execute(f'PRAGMA {pragma}={value}')
+            db.executescript(SCHEMA)
+            setattr(local, name, db)
+        return db
+
+    @contextmanager
+    def _write(self):
+        """A write transaction, taking the lock up front."""
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        if next(self._writes) % CHECK_EVERY == 0:
+            self._cull()
+
+    @staticmethod
+    def _encode(value):
+        # Plain ints stay ints so incr() can add to them in SQL
+        if type(value) is int and -(2**63) <= value < 2**63:
+            return value, 8
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return data, len(data)
+
+    @staticmethod
+    def _decode(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def _expiry(self, timeout) -> float:
+        expiry = self.get_backend_timeout(timeout)
+        return NEVER if expiry is None else expiry
+
+    def _row(self, key, value, timeout):
+        data, size = self._encode(value)
+        return key, data, size, self._expiry(timeout), time.time()
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, accessed FROM cache WHERE key IN ({placeholders}) AND expires > ?',
+            [*keys, now],
+        ).fetchall()
+        stale = [key for key, _, accessed in rows if accessed < now - LRU_RESOLUTION]
+        if stale:
+            self._touch_accessed(stale, now)
+        return {keys[key]: self._decode(value) for key, value, _ in rows}
+
+    def _touch_accessed(self, keys, now):
+        try:
+            # Its own connection that never waits for the write lock: a read
+            # must not take up to busy_timeout because another process writes
+            self._connection('touch_db', busy_timeout=0).execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN ({",".join("?" * len(keys))})', [now, *keys]
+            )
+        except sqlite3.OperationalError:
+            # Busy: recency is a hint, the read already succeeded
+            pass
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [self._row(self.make_and_validate_key(key, version=version), value, timeout)
+                for key, value in data.items()]
+        with self._write() as db:
+            db.executemany('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)', rows)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as db:
+            return self._add(db, self._row(key, value, timeout))
+
+    def add_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        """``add`` of every item in one transaction; returns the keys that
+        were already there, as ``set_many`` returns the ones it couldn't set."""
+        rows = {key: self._row(self.make_and_validate_key(key, version=version), value, timeout)
+                for key, value in data.items()}
+        with self._write() as db:
+            return [key for key, row in rows.items() if not self._add(db, row)]
+
+    @staticmethod
+    def _add(db, row) -> bool:
+        # Inserts, or replaces an expired entry; a live one is left alone
+        cursor = db.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, size = excluded.size, expires = excluded.expires, '
+            'accessed = excluded.accessed WHERE cache.expires <= excluded.accessed',
+            row,
+        )
+        return cursor.rowcount == 1
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        missing = object()
+        if (value := self.get(key, missing, version)) is not missing:
+            return value
+        if callable(default):
+            default = default()
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as db:
+            # Whoever got there first wins; everyone returns the stored value
+            self._add(db, self._row(key, default, timeout))
+            (value,) = db.execute('SELECT value FROM cache WHERE key = ?', [key]).fetchone()
+        return self._decode(value)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as db:
+            row = db.execute(
+                'UPDATE cache SET value = value + ? '
+                "WHERE key = ? AND expires > ? AND typeof(value) = 'integer' RETURNING value",
+                [delta, key, time.time()],
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as db:
+            cursor = db.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND expires > ?',
+                [self._expiry(timeout), now, key, now],
+            )
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND expires > ?', [key, time.time()]
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return False
+        with self._write() as db:
+            cursor = db.execute(f'DELETE FROM cache WHERE key IN ({",".join("?" * len(keys))})', keys)
+        return cursor.rowcount > 0
+
+    def clear(self):
+        with self._write() as db:
+            db.execute('DELETE FROM cache')
+
+    def _cull(self):
+        db = self._connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM cache WHERE expires <= ?', [time.time()])
+            count, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+            while count > self._max_entries or (self.max_bytes and size > self.max_bytes):
+                if self._cull_frequency == 0:
+                    db.execute('DELETE FROM cache')
+                    break
+                # Least recently used first
+                db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    [max(count // self._cull_frequency, 1)],
+                )
+                count, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
@@ -0,0 +1,217 @@
+"""Background jobs stored in the project database.
+
+    from shared import jobs
+    job = jobs.enqueue('posts.tasks.rebuild_search_index', dict(optimize=True))
+
+``enqueue()`` only inserts a ``Job`` row, in the caller's transaction: a job
+enqueued by a request that then fails is rolled back with it. ``manage.py
+run_workers`` claims ready jobs and runs them on a pool of processes:
+
+- Claiming is a conditional ``UPDATE`` of one row, so two workers never get
+  the same job. The claim is a lease (``JOBS_LEASE``) the worker keeps
+  renewing; the jobs of a worker that died are claimed again once it expires.
+- A task that raises is retried up to ``max_attempts`` times, each attempt
+  ``JOBS_RETRY_DELAY`` seconds later than the previous one, doubled every
+  time (up to ``JOBS_RETRY_MAX_DELAY``), then marked as failed.
+- Tasks are plain functions taking JSON-serializable keyword arguments. They
+  can report how far they got with ``progress()``, which does nothing when
+  the function is called outside a job.
+- A task that must not redo work on a retry records it with ``checkpoint()``
+  in the transaction that does it, and starts from ``resume_from()``.
+"""
+
+import contextvars
+import logging
+import random
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress writes of the same job
+PROGRESS_INTERVAL = 1.0
+
+
+class JobLost(Exception):
+    """The current job was claimed by another worker (its lease ran out)."""
+
+
+@dataclass
+class _Running:
+    pk: int
+    worker: str
+    written_at: float = 0.0
+    # ``progress`` when the attempt started: the last checkpoint of the previous ones
+    checkpoint: int = 0
+
+
+_current: contextvars.ContextVar[_Running | None] = contextvars.ContextVar('current_job', default=None)
+
+
+def task_path(task) -> str:
+    if isinstance(task, str):
+        import_string(task)  # fail now rather than in the worker
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, kwargs: dict | None = None, *, priority: int = 0, delay: float = 0,
+            max_attempts: int | None = None, created_by=None) -> Job:
+    """Queue ``task(**kwargs)``; ``task`` is a function or its dotted path."""
+    return Job.objects.create(
+        task=task_path(task),
+        kwargs=kwargs or {},
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        created_by=created_by,
+    )
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds before retrying after the ``attempt``-th failure, with some jitter
+    so jobs that failed together don't all come back together."""
+    delay = min(settings.JOBS_RETRY_DELAY * 2 ** (attempt - 1), settings.JOBS_RETRY_MAX_DELAY)
+    return delay * random.uniform(1, 1.2)
+
+
+def _claimable(now) -> Q:
+    return Q(status=Job.Status.QUEUED, run_at__lte=now) | Q(status=Job.Status.RUNNING, locked_until__lt=now)
+
+
+def claim(limit: int, worker: str) -> list[int]:
+    """Take up to ``limit`` ready jobs for ``worker``; returns their ids."""
+    now = timezone.now()
+    candidates = Job.objects.filter(_claimable(now)).order_by('priority', 'run_at', 'pk')
+    claimed = []
+    for pk in candidates.values_list('pk', flat=True)[: limit * 2]:
+        # Only one worker can switch the row while it is still claimable
+        taken = Job.objects.filter(_claimable(now), pk=pk).update(
+            status=Job.Status.RUNNING,
+            worker=worker,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if taken:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def renew_leases(worker: str) -> int:
+    locked_until = timezone.now() + timedelta(seconds=settings.JOBS_LEASE)
+    return Job.objects.filter(status=Job.Status.RUNNING, worker=worker).update(locked_until=locked_until)
+
+
+def release(pks, worker: str) -> int:
+    """Give up running jobs (their process died): claimable again at once."""
+    return Job.objects.filter(pk__in=list(pks), worker=worker, status=Job.Status.RUNNING).update(
+        locked_until=timezone.now()
+    )
+
+
+def _finish(pk: int, worker: str, **fields) -> bool:
+    # A worker that lost its lease doesn't get to overwrite the new owner's state
+    owned = Job.objects.filter(pk=pk, worker=worker, status=Job.Status.RUNNING)
+    return bool(owned.update(locked_until=None, **fields))
+
+
+def execute(pk: int, worker: str):
+    """Run one claimed job and record the outcome (called in a pool process)."""
+    job = Job.objects.get(pk=pk)
+    if job.attempts > job.max_attempts:
+        # Claimed again after its worker died mid-attempt, and that was the last one
+        _finish(pk, worker, status=Job.Status.FAILED, finished_at=timezone.now(),
+                error=job.error or 'Worker lost while running the job')
+        return
+
+    token = _current.set(_Running(pk, worker, checkpoint=job.progress))
+    started = time.perf_counter()
+    try:
+        import_string(job.task)(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            logger.warning('Job %s failed (attempt %s/%s), retrying in %.0fs',
+                           job, job.attempts, job.max_attempts, delay)
+            _finish(pk, worker, status=Job.Status.QUEUED, error=error,
+                    run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error('Job %s failed after %s attempts', job, job.attempts)
+            _finish(pk, worker, status=Job.Status.FAILED, error=error, finished_at=timezone.now())
+    else:
+        logger.info('Job %s done in %.2fs', job, time.perf_counter() - started)
+        _finish(pk, worker, status=Job.Status.DONE, error='', finished_at=timezone.now())
+    finally:
+        _current.reset(token)
+
+
+def progress(done: int, total: int | None = None, message: str = ''):
+    """Record how far the current job got. Writes are throttled to one per
+    ``PROGRESS_INTERVAL`` (and the final ``done == total`` one)."""
+    if (running := _current.get()) is None:
+        return
+    now = time.monotonic()
+    if now - running.written_at < PROGRESS_INTERVAL and done != total:
+        return
+    running.written_at = now
+    Job.objects.filter(pk=running.pk, worker=running.worker).update(
+        progress=done, total=total, message=message[:200]
+    )
+
+
+def checkpoint(done: int, total: int | None = None, message: str = ''):
+    """``progress()`` for work that must not be done twice: never throttled, and
+    called in the transaction that did the work, so the job's ``progress`` is
+    exactly what was committed. Raises ``JobLost``, rolling that transaction
+    back, if the job belongs to another worker by now."""
+    if (running := _current.get()) is None:
+        return
+    running.written_at = time.monotonic()
+    owned = Job.objects.filter(pk=running.pk, worker=running.worker, status=Job.Status.RUNNING)
+    if not owned.update(progress=done, total=total, message=message[:200]):
+        raise JobLost(f'Job {running.pk} is no longer run by {running.worker}')
+
+
+def resume_from() -> int:
+    """The last ``checkpoint()`` of earlier attempts of the current job, 0 on
+    the first one or outside a job."""
+    if (running := _current.get()) is None:
+        return 0
+    return running.checkpoint
+
+
+def queue_stats(window: timedelta = timedelta(hours=1)) -> dict:
+    """Queue depth and throughput over the last ``window``, for the admin."""
+    now = timezone.now()
+    finished = Job.objects.filter(finished_at__gte=now - window)
+    by_status = dict(Job.objects.values_list('status').annotate(Count('pk')).order_by())
+    waiting = Job.objects.filter(status=Job.Status.QUEUED)
+    throughput = finished.aggregate(
+        done=Count('pk', filter=Q(status=Job.Status.DONE)),
+        failed=Count('pk', filter=Q(status=Job.Status.FAILED)),
+        duration=Avg(F('finished_at') - F('started_at')),
+    )
+    oldest = waiting.filter(run_at__lte=now).aggregate(oldest=Min('run_at'))['oldest']
+    return dict(
+        ready=waiting.filter(run_at__lte=now).count(),
+        scheduled=waiting.filter(run_at__gt=now).count(),
+        running=by_status.get(Job.Status.RUNNING, 0),
+        done_total=by_status.get(Job.Status.DONE, 0),
+        failed_total=by_status.get(Job.Status.FAILED, 0),
+        oldest_wait=now - oldest if oldest else None,
+        per_minute=round(throughput['done'] / (window.total_seconds() / 60), 2),
+        **throughput,
+    )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.startup import compile_templates, template_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile every template the project can load, as production workers do when they '
+        'start (shared.startup.warmup), and list the ones that fail.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('app_labels', nargs='*', help="Only these apps' templates (default: all)")
+
+    def handle(self, *args, **options):
+        try:
+            names = template_names(options['app_labels'] or None)
+        except LookupError as error:
+            raise CommandError(error)
+        started = time.perf_counter()
+        errors = compile_templates(names)
+        elapsed = time.perf_counter() - started
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'{len(errors)} of {len(names)} templates do not compile')
+        self.stdout.write(self.style.SUCCESS(f'Compiled {len(names)} templates in {elapsed * 1000:.1f}ms'))
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from shared import jobs
+from shared.worker import init_process
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs on a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_WORKERS,
+            help=f'Jobs run at the same time (default: {settings.JOBS_WORKERS})',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is ready instead of waiting for more',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds between looks at the queue while idle',
+        )
+
+    def handle(self, *args, **options):
+        processes, burst, poll = options['processes'], options['burst'], options['poll_interval']
+        if processes < 1:
+            raise CommandError('--processes must be positive')
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        self.stdout.write(f'Worker {name}: {processes} processes')
+        done = 0
+        renewed = time.monotonic()
+        pool, running = self.start_pool(processes), {}
+        try:
+            while True:
+                if not self.stopping and len(running) < processes:
+                    for pk in jobs.claim(processes - len(running), name):
+                        running[pool.submit(jobs.execute, pk, name)] = pk
+                if not running:
+                    if self.stopping or burst:
+                        break
+                    time.sleep(poll)
+                    continue
+
+                finished, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in finished):
+                    # A process died (killed, out of memory...) and took the pool
+                    # with it: its jobs can be claimed again right away
+                    self.stderr.write(f'Worker process lost, jobs {sorted(running.values())} released')
+                    jobs.release(running.values(), name)
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.start_pool(processes)
+                    continue
+                for future in finished:
+                    pk = running.pop(future)
+                    if (error := future.exception()) is not None:
+                        self.stderr.write(f'Job #{pk}: {error!r}')
+                    done += 1
+                if time.monotonic() - renewed > settings.JOBS_LEASE / 4:
+                    jobs.renew_leases(name)
+                    renewed = time.monotonic()
+        finally:
+            pool.shutdown()
+            connections.close_all()
+        self.stdout.write(self.style.SUCCESS(f'Worker {name}: {done} jobs run'))
+
+    def start_pool(self, processes: int) -> ProcessPoolExecutor:
+        # spawn: pool processes open their own database connections instead of
+        # inheriting this one
+        context = multiprocessing.get_context('spawn')
+        return ProcessPoolExecutor(processes, mp_context=context, initializer=init_process)
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        self.stopping = True
+        self.stderr.write('Stopping: waiting for the running jobs (again to abort)')
@@ -0,0 +1,101 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a new interpreter: this one has already paid every start-up cost
+PROBE = (
+    'import time; started = time.perf_counter(); '
+    'from shared import startup; startup.probe(started, {url!r}, warm={warm!r})'
+)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) from the output of ``python -X importtime``."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line.removeprefix('import time:').split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Start-up cost of a fresh worker process: time per imported module and per setup '
+        'phase up to its first responses, cold and after shared.startup.warmup().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/posts/', help='Requested twice by each process (default: /posts/)')
+        parser.add_argument('--top', type=int, default=15, help='Modules and packages listed (default: 15)')
+        parser.add_argument('--json', action='store_true', help='Print the measurements as JSON')
+
+    def probe(self, url: str, warm: bool, importtime: bool = False) -> tuple[dict, list]:
+        command = [sys.executable, *(['-X', 'importtime'] if importtime else []),
+                   '-c', PROBE.format(url=url, warm=warm)]
+        # Same settings: --settings has been copied to DJANGO_SETTINGS_MODULE
+        result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Probe process failed:\n{result.stderr[-2000:]}')
+        return json.loads(result.stdout.splitlines()[-1]), parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        url, top = options['url'], options['top']
+        # Cold first: with a shared cache, the warm run may find the page already rendered
+        cold, modules = self.probe(url, warm=False, importtime=True)
+        warm, _ = self.probe(url, warm=True)
+
+        packages = defaultdict(int)
+        for name, own, _ in modules:
+            packages[name.split('.')[0]] += own
+        slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:top]
+        by_package = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'url': url,
+                'cold': cold,
+                'warm': warm,
+                'imports': {
+                    'modules': len(modules),
+                    'total_us': sum(own for _, own, _ in modules),
+                    'packages_us': dict(by_package),
+                    'slowest_cumulative_us': {name: cumulative for name, _, cumulative in slowest},
+                },
+            }))
+            self.check_responses(url, cold, warm)
+            return
+
+        self.stdout.write(f'{"phase":<42}{"cold":>10}{"warm":>10}')
+        # The warm run has every phase of the cold one, in order
+        for name in dict.fromkeys([*warm['phases'], *cold['phases']]):
+            cells = ''.join(
+                f'{run["phases"][name] * 1000:>8.1f}ms' if name in run['phases'] else f'{"-":>10}'
+                for run in (cold, warm)
+            )
+            self.stdout.write(f'{name:<42}{cells}')
+        totals = ''.join(f'{sum(run["phases"].values()) * 1000:>8.1f}ms' for run in (cold, warm))
+        self.stdout.write(self.style.SUCCESS(f'{"total, up to the second response":<42}{totals}'))
+        self.stdout.write(f'responses: cold {cold["status"]}, warm {warm["status"]}')
+
+        total = sum(own for _, own, _ in modules)
+        self.stdout.write(f'\nImports (cold): {len(modules)} modules, {total / 1000:.1f}ms of their own code')
+        self.stdout.write('By top-level package:')
+        for name, own in by_package:
+            self.stdout.write(f'  {name:<40}{own / 1000:>8.1f}ms')
+        self.stdout.write('Slowest modules, including what they import:')
+        for name, _, cumulative in slowest:
+            self.stdout.write(f'  {name:<40}{cumulative / 1000:>8.1f}ms')
+        self.check_responses(url, cold, warm)
+
+    def check_responses(self, url: str, cold: dict, warm: dict):
+        # The timings of an error page say nothing about the real one
+        failed = {name: run['status'] for name, run in (('cold', cold), ('warm', warm)) if run['status'][:1] != '2'}
+        if failed:
+            statuses = ', '.join(f'{name} {status}' for name, status in failed.items())
+            raise CommandError(f'GET {url} did not succeed ({statuses}): these timings are not of the page')
@@ -0,0 +1,303 @@
+import cProfile
+import json
+import logging
+import mimetypes
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware as DjangoSessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.text import slugify
+
+from . import profiling
+from .sessions import SAFE_METHODS, SessionlessStore
+from .staticfiles import ENCODINGS, choose_encoding
+
+logger = logging.getLogger('shared.profiling')
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+class ProfilingMiddleware:
+    """Timing and SQL accounting for a sample of requests.
+
+    A sampled request (``PROFILING_SAMPLE_RATE``) gets a ``Server-Timing``
+    header (total / app / db / tpl) and a JSON log line on the
+    ``shared.profiling`` logger with query count, duplicate queries and peak
+    traced memory. Staff users can send ``X-Profile: cprofile`` or
+    ``X-Profile: pyinstrument`` to have the request profiled and the dump
+    written to ``PROFILING_DUMP_DIR``.
+
+    Place it after ``AuthenticationMiddleware``: it needs ``request.user``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        profiling.install()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profiler_name = self.requested_profiler(request, getattr(request, 'user', None))
+        if not profiler_name and not self.sampled():
+            return self.get_response(request)
+
+        profile, token = self.start()
+        profiler = self.start_profiler(profiler_name)
+        try:
+            response = self.get_response(request)
+        finally:
+            dump = self.stop_profiler(profiler, request)
+            self.stop(profile, token)
+        return self.report(request, response, profile, dump)
+
+    async def __acall__(self, request):
+        user = None
+        # request.user would load it synchronously, which async code can't do
+        if self.profiler_header(request) and hasattr(request, 'auser'):
+            user = await request.auser()
+        profiler_name = self.requested_profiler(request, user)
+        if not profiler_name and not self.sampled():
+            return await self.get_response(request)
+
+        profile, token = self.start()
+        # Other coroutines running on the loop meanwhile show up in the dump
+        profiler = self.start_profiler(profiler_name)
+        try:
+            response = await self.get_response(request)
+        finally:
+            dump = self.stop_profiler(profiler, request)
+            self.stop(profile, token)
+        return self.report(request, response, profile, dump)
+
+    @staticmethod
+    def sampled() -> bool:
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    @staticmethod
+    def profiler_header(request) -> str | None:
+        name = request.headers.get('X-Profile', '').lower()
+        return name if name in PROFILERS else None
+
+    @classmethod
+    def requested_profiler(cls, request, user) -> str | None:
+        name = cls.profiler_header(request)
+        return name if name and user is not None and user.is_staff else None
+
+    @staticmethod
+    def start():
+        profile = profiling.RequestProfile()
+        if settings.PROFILING_TRACE_MEMORY:
+            profiling.memory.start()
+        return profile, profiling.current.set(profile)
+
+    @staticmethod
+    def stop(profile, token):
+        profile.finish()
+        profiling.current.reset(token)
+        if settings.PROFILING_TRACE_MEMORY:
+            profile.peak_memory = profiling.memory.stop()
+
+    @staticmethod
+    def start_profiler(name: str | None):
+        if name == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                # Optional dependency: fall back to the stdlib profiler
+                name = 'cprofile'
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        if name == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        return None
+
+    @staticmethod
+    def stop_profiler(profiler, request) -> Path | None:
+        if profiler is None:
+            return None
+        dump_dir = Path(settings.PROFILING_DUMP_DIR)
+        dump_dir.mkdir(parents=True, exist_ok=True)
+        stem = '-'.join(
+            (
+                time.strftime('%Y%m%d-%H%M%S'),
+                request.method.lower(),
+                slugify(request.path) or 'root',
+                uuid.uuid4().hex[:6],
+            )
+        )
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = dump_dir / f'{stem}.prof'
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = dump_dir / f'{stem}.html'
+            path.write_text(profiler.output_html())
+        return path
+
+    @staticmethod
+    def report(request, response, profile: profiling.RequestProfile, dump: Path | None):
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 2)
+
+        response['Server-Timing'] = ', '.join(
+            (
+                f'total;dur={ms(profile.total)}',
+                f'app;dur={ms(profile.app)}',
+                f'db;dur={ms(profile.db)};desc="{profile.query_count} queries"',
+                f'tpl;dur={ms(profile.template)}',
+            )
+        )
+        if dump is not None:
+            response['X-Profile-Dump'] = dump.name
+
+        duplicates = profile.duplicates
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': ms(profile.total),
+            'app_ms': ms(profile.app),
+            'db_ms': ms(profile.db),
+            'template_ms': ms(profile.template),
+            'queries': profile.query_count,
+            'duplicate_queries': sum(duplicates.values()) - len(duplicates),
+            'peak_memory_kib': profile.peak_memory // 1024 if profile.peak_memory is not None else None,
+        }
+        if duplicates:
+            record['duplicates'] = {sql[:200]: n for sql, n in duplicates.items()}
+        if dump is not None:
+            record['dump'] = str(dump)
+        logger.info(json.dumps(record))
+        return response
+
+
+@dataclass
+class StaticFile:
+    path: Path
+    content_type: str
+    # encoding -> (file, ETag); always has 'identity'
+    variants: dict[str, tuple[Path, str]]
+    immutable: bool
+
+
+class StaticFilesMiddleware:
+    """Serve ``STATIC_ROOT`` from the app itself (no nginx in front).
+
+    Files are indexed once at startup (run ``collectstatic`` first): the
+    precompressed ``.br``/``.gz`` variant accepted by the client is sent as is,
+    and hashed names from ``staticfiles.json`` are cached for a year as
+    ``immutable``; anything else gets ``STATIC_MAX_AGE``. Put it right after
+    ``SecurityMiddleware`` so static requests skip the rest of the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.prefix = '/' + urlparse(settings.STATIC_URL).path.strip('/') + '/'
+        self.files = self.index(Path(settings.STATIC_ROOT))
+        if not self.files:
+            raise MiddlewareNotUsed('STATIC_ROOT is empty: run collectstatic')
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if (response := self.serve(request)) is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if (response := self.serve(request)) is not None:
+            return response
+        return await self.get_response(request)
+
+    @staticmethod
+    def index(root: Path) -> dict[str, StaticFile]:
+        if not root.is_dir():
+            return {}
+        manifest = root / 'staticfiles.json'
+        hashed = set(json.loads(manifest.read_text())['paths'].values()) if manifest.exists() else set()
+        suffixes = {suffix: encoding for encoding, suffix in ENCODINGS.items()}
+        files = {}
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or path.suffix in suffixes or path == manifest:
+                continue
+            name = path.relative_to(root).as_posix()
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            candidates = {'identity': path}
+            candidates.update({enc: path.with_name(path.name + suffix) for suffix, enc in suffixes.items()})
+            variants = {}
+            for encoding, variant in candidates.items():
+                if variant.exists():
+                    stat = variant.stat()
+                    variants[encoding] = (variant, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+            files[name] = StaticFile(path, content_type, variants, immutable=name in hashed)
+        return files
+
+    def serve(self, request) -> HttpResponse | None:
+        if not request.path.startswith(self.prefix) or request.method not in ('GET', 'HEAD'):
+            return None
+        if (static := self.files.get(request.path[len(self.prefix) :])) is None:
+            return None
+
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''), static.variants)
+        path, etag = static.variants[encoding]
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            # Read whole: static assets are small, and a file iterator would be
+            # consumed synchronously under ASGI
+            response = HttpResponse(b'' if request.method == 'HEAD' else path.read_bytes(), static.content_type)
+            response['Content-Length'] = path.stat().st_size
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Cache-Control'] = self.IMMUTABLE if static.immutable else f'public, max-age={settings.STATIC_MAX_AGE}'
+        if len(static.variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+class SessionMiddleware(DjangoSessionMiddleware):
+    """Django's, except for ``@sessionless`` views (see shared.sessions).
+
+    The session is attached lazily as usual and swapped for an empty one once
+    the view is known, so it is never loaded unless a middleware before the
+    view already read it (the profiler checking a staff user, say).
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'sessionless', False) and request.method in SAFE_METHODS:
+            request.session = SessionlessStore()
+
+    def process_response(self, request, response):
+        if isinstance(getattr(request, 'session', None), SessionlessStore):
+            # Not even the "empty session" cookie deletion: the real one is untouched
+            return response
+        return super().process_response(request, response)
@@ -1,3 +1,48 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Job(models.Model):
+    """A call to a function run later by ``manage.py run_workers`` (see shared.jobs)."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    # Dotted path of the function and its keyword arguments
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    # Lower runs first
+    priority = models.SmallIntegerField(default=0)
+    # Not before this time (retries are pushed back here)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    # Claimed by ``worker`` until then; a running job past it is claimed again
+    worker = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Who queued it from a view, the only user who gets to see its status
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            # What run_workers asks for: the next ready jobs, in order
+            models.Index(fields=['status', 'priority', 'run_at'], name='shared_job_next_idx'),
+            models.Index(fields=['finished_at'], name='shared_job_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.pk} {self.task} ({self.status})'
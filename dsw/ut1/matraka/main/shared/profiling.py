@@ -0,0 +1,121 @@
+"""Per-request measurements used by ``shared.middleware.ProfilingMiddleware``.
+
+The active profile lives in a context variable, so it follows the request
+into ``sync_to_async`` threads. SQL is timed by an execute wrapper added to
+every database connection, and template time by wrapping the top-level
+``Template.render`` of the Django backend (includes and ``extends`` happen
+inside it and aren't counted twice).
+"""
+
+import contextvars
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+current = contextvars.ContextVar('request_profile', default=None)
+
+
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    total: float = 0.0
+    db: float = 0.0
+    template: float = 0.0
+    queries: Counter = field(default_factory=Counter)
+    peak_memory: int | None = None
+
+    @property
+    def query_count(self) -> int:
+        return sum(self.queries.values())
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        return {sql: n for sql, n in self.queries.items() if n > 1}
+
+    @property
+    def app(self) -> float:
+        """Python time: everything that isn't SQL or template rendering."""
+        return max(self.total - self.db - self.template, 0.0)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+
+def record_sql(execute, sql, params, many, context):
+    if (profile := current.get()) is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db += time.perf_counter() - started
+        # Same statement with the same parameters = duplicate query
+        profile.queries[f'{sql} {params!r}'] += 1
+
+
+def _add_wrapper(connection):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        if (profile := current.get()) is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template += time.perf_counter() - started
+
+    wrapper.__wrapped__ = render
+    return wrapper
+
+
+_installed = False
+
+
+def install():
+    """Hook SQL and template timing in; idempotent, done once per process."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    connection_created.connect(lambda sender, connection, **kwargs: _add_wrapper(connection), weak=False)
+    for connection in connections.all(initialized_only=True):
+        _add_wrapper(connection)
+    Template.render = _timed_render(Template.render)
+
+
+class MemoryTracer:
+    """Shared tracemalloc session: tracing is process wide, so concurrent
+    sampled requests share it and the last one out stops it. Their peaks can
+    include each other's allocations."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+    def start(self):
+        with self.lock:
+            if self.users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.users += 1
+            tracemalloc.reset_peak()
+
+    def stop(self) -> int:
+        with self.lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.users -= 1
+            if self.users == 0:
+                tracemalloc.stop()
+            return peak
+
+
+memory = MemoryTracer()
@@ -0,0 +1,40 @@
+"""Views that never load nor save the session.
+
+Mark read-only views with ``@sessionless`` and use
+``shared.middleware.SessionMiddleware`` instead of Django's: on ``GET`` and
+``HEAD`` those views get an empty session that never reaches the session
+backend. Users are anonymous there, nothing is written back, and
+responses don't get ``Vary: Cookie``, whatever the templates touch.
+"""
+
+from django.contrib.sessions.backends.base import SessionBase
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def sessionless(view):
+    view.sessionless = True
+    return view
+
+
+class SessionlessStore(SessionBase):
+    """Always empty; anything written to it is dropped with the request."""
+
+    def load(self):
+        return {}
+
+    def exists(self, session_key):
+        return False
+
+    def create(self):
+        pass
+
+    def save(self, must_create=False):
+        pass
+
+    def delete(self, session_key=None):
+        pass
+
+    @classmethod
+    def clear_expired(cls):
+        pass
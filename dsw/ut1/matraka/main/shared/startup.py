@@ -0,0 +1,168 @@
+"""Start-up cost of a worker process, and paying it before the first request.
+
+A fresh worker only imports settings, apps and middleware. The first request
+also imports every view module (building the URL resolver), compiles the
+templates it renders and opens the database connection. ``warmup()`` does
+those three things, plus the caches, up front; a template that doesn't
+compile makes it raise, so a broken deploy fails at start-up. ``main.wsgi`` and
+``main.asgi`` call it when ``WARMUP_ON_START`` is set, before the server
+hands the worker any traffic.
+
+With a server that imports the application before forking (gunicorn
+``--preload``), warm up in each worker instead, e.g. gunicorn's
+``post_worker_init`` hook: a database connection must not cross a fork.
+Under ASGI the database part buys nothing, as queries run in another thread.
+
+``probe()`` is the other half, run by ``manage.py startup_profile`` in a new
+interpreter: it times each phase of that process up to its second request.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls() -> int:
+    """Import every urlconf (and its views) and build the reverse lookups."""
+
+    def populate(resolver):
+        count = len(resolver.reverse_dict)
+        # Namespaced includes (posts:, admin:) are only built on first use
+        for _, child in resolver.namespace_dict.values():
+            count += populate(child)
+        return count
+
+    return populate(get_resolver())
+
+
+def template_directories(app_labels=None) -> list[Path]:
+    """``templates`` directories of these apps; all the engines read from if None."""
+    if app_labels is not None:
+        return [Path(apps.get_app_config(label).path) / 'templates' for label in app_labels]
+    directories = []
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            for loader in engine.engine.template_loaders:
+                # The cached loader wraps the ones that read the files
+                for source in getattr(loader, 'loaders', [loader]):
+                    directories += map(Path, source.get_dirs())
+    return directories
+
+
+def template_names(app_labels=None) -> list[str]:
+    names = {}
+    for directory in template_directories(app_labels):
+        for path in sorted(directory.rglob('*')):
+            if path.is_file() and not path.name.startswith('.'):
+                names.setdefault(path.relative_to(directory).as_posix())
+    return list(names)
+
+
+def compile_templates(names) -> dict[str, Exception]:
+    """Compile (and with the cached loader, keep) every template; returns the ones that failed."""
+    errors = {}
+    for name in names:
+        try:
+            get_template(name)
+        except TemplateSyntaxError as error:
+            errors[name] = error
+    return errors
+
+
+def warm_templates(app_labels=None) -> int:
+    names = template_names(app_labels)
+    if errors := compile_templates(names):
+        raise TemplateSyntaxError(
+            'Templates that do not compile:\n' + '\n'.join(f'{name}: {error}' for name, error in errors.items())
+        )
+    return len(names)
+
+
+def warm_databases() -> int:
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def warm_caches() -> int:
+    # Builds the backends; SQLiteCache opens its file and checks its schema
+    for alias in settings.CACHES:
+        caches[alias].has_key('startup:warmup')
+    return len(settings.CACHES)
+
+
+def warmup() -> dict[str, float]:
+    """Run every warm-up step; returns the seconds each one took."""
+    steps = {
+        'urls': warm_urls,
+        'templates': lambda: warm_templates(settings.WARMUP_TEMPLATE_APPS),
+        'databases': warm_databases,
+        'caches': warm_caches,
+    }
+    timings, counts = {}, {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        counts[name] = step()
+        timings[name] = time.perf_counter() - started
+    logger.info(
+        'warmup %.1fms: %s',
+        sum(timings.values()) * 1000,
+        ', '.join(f'{name} {counts[name]} in {timings[name] * 1000:.1f}ms' for name in steps),
+    )
+    return timings
+
+
+def request(application, url: str) -> str:
+    """GET ``url`` through the WSGI application, as the server would."""
+    path, _, query = url.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    status = []
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        b''.join(response)
+    finally:
+        # request_finished: what a server does after each response
+        response.close()
+    return status[0]
+
+
+def probe(started: float, url: str, warm: bool):
+    """Time each start-up phase of this process and print them as JSON.
+
+    ``started`` is when the interpreter began importing this module. Only
+    meaningful in a new process, before Django is set up.
+    """
+    import django
+    from django.core.wsgi import get_wsgi_application
+
+    phases = {'import django (urls, db, templates)': time.perf_counter() - started}
+
+    def phase(name, step, *args):
+        began = time.perf_counter()
+        result = step(*args)
+        phases[name] = time.perf_counter() - began
+        return result
+
+    phase('settings', lambda: settings.INSTALLED_APPS)
+    phase('django.setup()', django.setup, False)
+    application = phase('WSGI handler (middleware)', get_wsgi_application)
+    if warm:
+        for name, seconds in warmup().items():
+            phases[f'warmup: {name}'] = seconds
+    status = phase(f'first request GET {url}', request, application, url)
+    phase('second request', request, application, url)
+    print(json.dumps({'phases': phases, 'status': status}))
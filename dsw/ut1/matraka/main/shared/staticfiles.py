@@ -0,0 +1,101 @@
+"""Static files pipeline for running without a front web server.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` (production
+profile) minifies CSS (``STATIC_MINIFY_CSS``), writes content-hashed copies
+of every file plus ``staticfiles.json``, and stores ``.gz`` and ``.br``
+siblings of every compressible file next to it. ``shared.middleware.
+StaticFilesMiddleware`` then serves them straight from ``STATIC_ROOT``.
+
+Brotli needs the optional ``brotli`` package; without it only gzip is built.
+"""
+
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.ttf', '.otf')
+# A variant that saves less than this isn't worth a separate file
+MIN_SAVING = 0.05
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+_CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace; quoted strings are left alone."""
+    css = _CSS_STRING_OR_COMMENT.sub(lambda m: m[1] or '', css)
+    parts = _CSS_STRING.split(css)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        parts[i] = re.sub(r':\s+', ':', code).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """The first of ``ENCODINGS`` in ``available`` that an Accept-Encoding
+    header allows, or ``'identity'``. ``q=0`` refuses a coding, even with ``*``."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        try:
+            quality = float(params.strip().removeprefix('q=')) if params.strip() else 1.0
+        except ValueError:
+            quality = 1.0
+        qualities[coding.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if encoding in available and qualities.get(encoding, qualities.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def compress(path: Path) -> list[Path]:
+    """Write the ``.br``/``.gz`` siblings of ``path`` that are worth keeping."""
+    data = path.read_bytes()
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    written = []
+    for encoding, compressed in variants.items():
+        target = path.with_name(path.name + ENCODINGS[encoding])
+        if len(compressed) < len(data) * (1 - MIN_SAVING):
+            target.write_bytes(compressed)
+            written.append(target)
+        else:
+            target.unlink(missing_ok=True)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        if settings.STATIC_MINIFY_CSS:
+            # Minify the collected copy before hashing, and hash from it rather
+            # than from the source file
+            paths = dict(paths)
+            for name in paths:
+                if name.endswith('.css'):
+                    with self.open(name) as original:
+                        css = original.read().decode()
+                    self.delete(name)
+                    self._save(name, ContentFile(minify_css(css).encode()))
+                    paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for name in {*paths, *self.hashed_files.values()}:
+            if name.endswith(COMPRESSIBLE):
+                compress(Path(self.path(name)))
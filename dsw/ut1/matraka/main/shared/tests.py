@@ -1,3 +1,372 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.core.signals import request_started
+from django.http import HttpResponse
+from django.template import TemplateSyntaxError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from . import jobs, startup
+from .asgi import ASGIHandler
+from .cache import SQLiteCache
+from .middleware import StaticFilesMiddleware
+from .models import Job
+from .sessions import sessionless
+from .staticfiles import choose_encoding, minify_css
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.dump_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dump_dir.cleanup)
+        self.settings = override_settings(PROFILING_DUMP_DIR=self.dump_dir.name, PROFILING_TRACE_MEMORY=False)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.staff = User.objects.create_user('staff', password='staff-password', is_staff=True)
+
+    def test_staff_gets_a_dump(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/posts/', headers={'X-Profile': 'cprofile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Profile-Dump'].endswith('.prof'))
+
+    async def test_staff_gets_a_dump_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get('/posts/', headers={'X-Profile': 'cprofile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Profile-Dump'].endswith('.prof'))
+
+    def test_anonymous_gets_no_dump(self):
+        response = self.client.get('/posts/', headers={'X-Profile': 'cprofile'})
+        self.assertNotIn('X-Profile-Dump', response)
+
+
+class ASGIHandlerTests(SimpleTestCase):
+    async def get(self, handler, path: str) -> int:
+        messages = []
+        # The body, then a client that stays connected until the response is out
+        requests = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+
+        async def receive():
+            return next(requests, None) or await asyncio.Future()
+
+        async def send(message):
+            messages.append(message)
+
+        scope = dict(type='http', method='GET', path=path, query_string=b'', headers=[(b'host', b'testserver')])
+        await handler(scope, receive, send)
+        return messages[0]['status']
+
+    def test_requests_share_the_threads_of_the_lanes(self):
+        threads = set()
+
+        def on_request_started(**kwargs):
+            threads.add(threading.get_ident())
+
+        request_started.connect(on_request_started)
+        self.addCleanup(request_started.disconnect, on_request_started)
+        handler = ASGIHandler(threads=2)
+
+        async def main():
+            return await asyncio.gather(*(self.get(handler, '/nowhere/') for _ in range(10)))
+
+        # Not an async test: under async_to_sync, sync code runs on the test's thread
+        statuses = asyncio.run(main())
+        self.assertEqual(statuses, [404] * 10)
+        self.assertEqual(len(threads), 2)
+        self.assertEqual(list(handler.lanes.values()), [0, 0])
+
+
+def touch_session(request):
+    request.session['seen'] = True
+    return HttpResponse(f'authenticated={request.user.is_authenticated}')
+
+
+# Both read and write the session; only one of them gets it
+urlpatterns = [
+    path('session/', touch_session),
+    path('sessionless/', sessionless(lambda request: touch_session(request))),
+]
+
+
+@override_settings(ROOT_URLCONF='shared.tests')
+class SessionlessTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('user', password='user-password'))
+
+    def test_sessionless_views_never_load_nor_save_the_session(self):
+        with (
+            mock.patch.object(SessionStore, 'load', autospec=True, side_effect=SessionStore.load) as load,
+            mock.patch.object(SessionStore, 'save', autospec=True, side_effect=SessionStore.save) as save,
+        ):
+            response = self.client.get('/sessionless/')
+            self.assertEqual(response.content, b'authenticated=False')
+            self.assertEqual((load.call_count, save.call_count), (0, 0))
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+            self.assertNotIn('Cookie', response.get('Vary', ''))
+
+            response = self.client.get('/session/')
+            self.assertEqual(response.content, b'authenticated=True')
+            self.assertEqual((load.call_count, save.call_count), (1, 1))
+            self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+
+class PurgeSessionsTests(TestCase):
+    def test_deletes_expired_sessions_in_batches(self):
+        yesterday, tomorrow = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f'session-{n}', session_data='', expire_date=yesterday if n < 5 else tomorrow)
+            for n in range(8)
+        )
+        out = io.StringIO()
+        with mock.patch('shared.management.commands.purge_sessions.time.sleep') as sleep:
+            call_command('purge_sessions', batch_size=2, stdout=out)
+        self.assertEqual(sorted(Session.objects.values_list('session_key', flat=True)), [
+            'session-5', 'session-6', 'session-7',
+        ])
+        self.assertIn('Deleted 5 expired sessions', out.getvalue())
+        # 2 + 2 + 1: a pause after each full batch
+        self.assertEqual(sleep.call_count, 2)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_nothing_to_purge_without_a_session_table(self):
+        out = io.StringIO()
+        call_command('purge_sessions', stdout=out)
+        self.assertIn('nothing to purge', out.getvalue())
+
+
+class StartupTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_workers_warm_up_on_import_when_enabled(self):
+        import main.wsgi
+
+        for enabled in (False, True):
+            with self.subTest(enabled=enabled), override_settings(WARMUP_ON_START=enabled):
+                with mock.patch('shared.startup.warmup') as warmup:
+                    importlib.reload(main.wsgi)
+                self.assertEqual(warmup.called, enabled)
+
+    def test_warmup_runs_every_step(self):
+        self.assertEqual(list(startup.warmup()), ['urls', 'templates', 'databases', 'caches'])
+
+    def test_a_template_that_does_not_compile_stops_the_warmup(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        (Path(directory.name) / 'broken.html').write_text('{% if %}')
+        templates = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [directory.name]}]
+        with override_settings(TEMPLATES=templates):
+            with self.assertRaisesMessage(TemplateSyntaxError, 'broken.html'):
+                startup.warm_templates()
+
+    def test_profile_fails_when_the_page_does_not(self):
+        probe = 'shared.management.commands.startup_profile.Command.probe'
+        run = {'phases': {'settings': 0.001}, 'status': '200 OK'}
+        broken = {**run, 'status': '500 Internal Server Error'}
+        with mock.patch(probe, side_effect=[(run, []), (run, [])]):
+            call_command('startup_profile', stdout=io.StringIO())
+        # Cold, then warm
+        with mock.patch(probe, side_effect=[(broken, []), (run, [])]):
+            with self.assertRaisesMessage(CommandError, 'cold 500 Internal Server Error'):
+                call_command('startup_profile', stdout=io.StringIO())
+
+
+class ChooseEncodingTests(SimpleTestCase):
+    def test_quality_values_and_preference(self):
+        both = ('identity', 'gzip', 'br')
+        cases = (
+            ('gzip, br', both, 'br'),
+            ('gzip', both, 'gzip'),
+            ('br;q=0, gzip;q=0.5', both, 'gzip'),
+            ('*', both, 'br'),
+            ('*, br;q=0', both, 'gzip'),
+            ('gzip;q=0, *', ('identity', 'gzip'), 'identity'),
+            ('br', ('identity', 'gzip'), 'identity'),
+            ('', both, 'identity'),
+        )
+        for accept_encoding, available, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding, available=available):
+                self.assertEqual(choose_encoding(accept_encoding, available), expected)
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        (root / 'css').mkdir()
+        # What collectstatic leaves: the file, its hashed copy, their variants
+        for name in ('css/site.css', 'css/site.0123abcd.css'):
+            (root / name).write_bytes(b'body{}')
+            (root / f'{name}.gz').write_bytes(b'gzip body')
+            (root / f'{name}.br').write_bytes(b'brotli body')
+        (root / 'robots.txt').write_bytes(b'User-agent: *')
+        (root / 'staticfiles.json').write_text(json.dumps({'paths': {'css/site.css': 'css/site.0123abcd.css'}}))
+        settings = override_settings(STATIC_ROOT=root, STATIC_URL='static/', STATIC_MAX_AGE=60)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse('from the app'))
+
+    def get(self, path: str, **headers):
+        return self.middleware(RequestFactory().get(path, headers=headers))
+
+    def test_sends_the_accepted_variant(self):
+        cases = (('gzip, br', b'brotli body', 'br'), ('gzip', b'gzip body', 'gzip'), ('', b'body{}', None))
+        for accept_encoding, body, encoding in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get('/static/css/site.0123abcd.css', accept_encoding=accept_encoding)
+                self.assertEqual(response.content, body)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_only_hashed_names_are_immutable(self):
+        self.assertEqual(self.get('/static/css/site.0123abcd.css')['Cache-Control'], StaticFilesMiddleware.IMMUTABLE)
+        self.assertEqual(self.get('/static/css/site.css')['Cache-Control'], 'public, max-age=60')
+        response = self.get('/static/robots.txt')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_revalidation_and_other_paths(self):
+        etag = self.get('/static/robots.txt')['ETag']
+        self.assertEqual(self.get('/static/robots.txt', if_none_match=etag).status_code, 304)
+        self.assertEqual(self.get('/static/missing.css').content, b'from the app')
+        self.assertEqual(self.get('/posts/').content, b'from the app')
+
+
+class MinifyCssTests(SimpleTestCase):
+    def test_strings_keep_what_comments_lose(self):
+        cases = (
+            ('a::after { content: "; }" ; }', 'a::after{content:"; }"}'),
+            ("a::after { content: 'it\\'s; }' }", "a::after{content:'it\\'s; }'}"),
+            ('/* a; } */ b {\n  color: red;\n}', 'b{color:red}'),
+            ('a { content: "/* kept; } */" } /* dropped "; } */', 'a{content:"/* kept; } */"}'),
+        )
+        for css, minified in cases:
+            with self.subTest(css=css):
+                self.assertEqual(minify_css(css), minified)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'cache.sqlite3'
+        self.cache = SQLiteCache(str(self.path), {})
+
+    def test_read_does_not_wait_for_another_writer(self):
+        self.cache.set('page', 'html')
+        with sqlite3.connect(self.path, isolation_level=None) as other:
+            # Old enough for the read to want to record its access time
+            other.execute('UPDATE cache SET accessed = 0')
+            other.execute('BEGIN IMMEDIATE')
+            started = time.perf_counter()
+            self.assertEqual(self.cache.get('page'), 'html')
+            self.assertLess(time.perf_counter() - started, 1)
+            other.execute('ROLLBACK')
+
+    def test_add_many_keeps_existing_keys(self):
+        self.cache.set('a', 1)
+        self.assertEqual(self.cache.add_many(dict(a=2, b=2)), ['a'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), dict(a=1, b=2))
+
+
+def succeed():
+    pass
+
+
+def fail():
+    raise RuntimeError('boom')
+
+
+class JobTests(TestCase):
+    def expire(self, job: Job):
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claim_takes_each_job_once_in_priority_order(self):
+        later, first = jobs.enqueue(succeed), jobs.enqueue(succeed, priority=-1)
+        jobs.enqueue(succeed, delay=60)
+        self.assertEqual(jobs.claim(5, 'one'), [first.pk, later.pk])
+        self.assertEqual(jobs.claim(5, 'two'), [])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.worker, first.attempts), (Job.Status.RUNNING, 'one', 1))
+
+    def test_expired_lease_goes_to_another_worker(self):
+        job = jobs.enqueue(succeed)
+        jobs.claim(1, 'one')
+        self.assertEqual(jobs.claim(1, 'two'), [])
+        self.expire(job)
+        self.assertEqual(jobs.claim(1, 'two'), [job.pk])
+        # The worker that lost it can't record an outcome any more
+        jobs.execute(job.pk, 'one')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.Status.RUNNING, 'two'))
+        jobs.execute(job.pk, 'two')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+
+    @override_settings(JOBS_RETRY_DELAY=10, JOBS_RETRY_MAX_DELAY=30)
+    def test_retry_delay_doubles_up_to_the_max(self):
+        with mock.patch('shared.jobs.random.uniform', return_value=1):
+            self.assertEqual([jobs.retry_delay(attempt) for attempt in (1, 2, 3, 4)], [10, 20, 30, 30])
+        self.assertTrue(10 <= jobs.retry_delay(1) <= 12)
+
+    @override_settings(JOBS_RETRY_DELAY=10)
+    def test_failed_attempts_are_retried_later_then_the_job_fails(self):
+        job = jobs.enqueue(fail, max_attempts=2)
+        jobs.claim(1, 'one')
+        jobs.execute(job.pk, 'one')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIn('boom', job.error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(jobs.claim(1, 'one'), [])
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.claim(1, 'one')
+        jobs.execute(job.pk, 'one')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(jobs.claim(1, 'one'), [])
+
+    def test_job_of_a_lost_worker_fails_after_its_last_attempt(self):
+        job = jobs.enqueue(succeed, max_attempts=1)
+        jobs.claim(1, 'one')
+        self.expire(job)
+        jobs.claim(1, 'two')
+        jobs.execute(job.pk, 'two')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Job.Status.FAILED, 'Worker lost while running the job'))
+
+    def test_checkpoint_needs_the_job_to_be_ours(self):
+        job = jobs.enqueue(succeed)
+        jobs.claim(1, 'one')
+        with mock.patch('shared.jobs.import_string', return_value=lambda: jobs.checkpoint(5)):
+            jobs.execute(job.pk, 'one')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (Job.Status.DONE, 5))
+
+        job = jobs.enqueue(succeed, max_attempts=1)
+        jobs.claim(1, 'one')
+        self.expire(job)
+        jobs.claim(1, 'two')
+        token = jobs._current.set(jobs._Running(job.pk, 'one'))
+        self.addCleanup(jobs._current.reset, token)
+        with self.assertRaises(jobs.JobLost):
+            jobs.checkpoint(5)
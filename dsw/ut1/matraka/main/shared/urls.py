@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'shared'
+
+urlpatterns = [
+    path('<int:job_id>/', views.job_status, name='job-status'),
+]
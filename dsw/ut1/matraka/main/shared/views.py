@@ -1,3 +1,18 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 
-# Create your views here.
+from .models import Job
+
+STATUS_FIELDS = ('id', 'task', 'status', 'attempts', 'progress', 'total', 'message', 'created_at', 'finished_at')
+
+
+@staff_member_required
+def job_status(request, job_id: int):
+    jobs = Job.objects.filter(pk=job_id)
+    # Someone else's job doesn't exist, as far as this user can tell
+    if not request.user.is_superuser:
+        jobs = jobs.filter(created_by=request.user)
+    job = jobs.values(*STATUS_FIELDS).first()
+    if job is None:
+        return JsonResponse(dict(error=f'Job {job_id} does not exist'), status=404)
+    return JsonResponse(job)
@@ -0,0 +1,15 @@
+"""Setup of the ``run_workers`` pool processes.
+
+A spawned process unpickles the initializer before Django is set up, so this
+module must not import models (``shared.jobs`` does).
+"""
+
+import signal
+
+
+def init_process():
+    import django
+
+    django.setup()
+    # Ctrl+C is for the parent, which lets the running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
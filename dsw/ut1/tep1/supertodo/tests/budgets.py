@@ -0,0 +1,125 @@
+"""Query-count and wall-time budgets for views.
+
+Fixtures (imported into conftest.py):
+
+- ``budget(queries=..., ms=...)``: context manager recording every SQL query
+  and the elapsed time of its block; fails when either budget is exceeded.
+- ``assert_constant_queries(url, populate, sizes)``: requests ``url`` after
+  ``populate(n)`` for every ``n`` in ``sizes`` and fails if the number of
+  queries changes with the number of rows (N+1).
+
+Failure messages list the offending SQL grouped by the line of project code
+that triggered it.
+"""
+
+import time
+import traceback
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test import Client
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+IGNORED_DIRS = ('site-packages', '.venv', 'lib/python')
+
+
+@dataclass
+class Query:
+    sql: str
+    site: str
+
+
+def call_site() -> str:
+    """Innermost frame of project code (not Django, not this file) on the stack."""
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        path = Path(frame.filename)
+        if path == Path(__file__) or any(part in frame.filename for part in IGNORED_DIRS):
+            continue
+        if PROJECT_DIR in path.parents:
+            return f'{path.relative_to(PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return '<unknown>'
+
+
+def format_queries(queries: list[Query]) -> str:
+    by_site = defaultdict(list)
+    for query in queries:
+        by_site[query.site].append(query.sql)
+    lines = []
+    for site, statements in sorted(by_site.items(), key=lambda item: -len(item[1])):
+        lines.append(f'  {site}: {len(statements)} queries')
+        for sql in dict.fromkeys(statements):
+            lines.append(f'      {statements.count(sql)}x {sql[:300]}')
+    return '\n'.join(lines)
+
+
+@dataclass
+class Budget:
+    queries: int | None = None
+    ms: float | None = None
+    label: str = ''
+    captured: list[Query] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    def _record(self, execute, sql, params, many, context):
+        self.captured.append(Query(sql, call_site()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+        label = f'{self.label}: ' if self.label else ''
+        if self.queries is not None and len(self.captured) > self.queries:
+            pytest.fail(
+                f'{label}{len(self.captured)} queries, budget is {self.queries}\n'
+                f'{format_queries(self.captured)}',
+                pytrace=False,
+            )
+        if self.ms is not None and self.elapsed_ms > self.ms:
+            pytest.fail(f'{label}took {self.elapsed_ms:.0f} ms, budget is {self.ms:.0f} ms', pytrace=False)
+        return False
+
+
+@pytest.fixture
+def budget():
+    def make(queries: int | None = None, ms: float | None = None, label: str = '') -> Budget:
+        return Budget(queries, ms, label)
+
+    return make
+
+
+@pytest.fixture
+def assert_constant_queries(client: Client):
+    def check(url: str, populate, sizes=(10, 1000), queries: int | None = None, ms: float | None = None):
+        """``populate(n)`` must bring the table to ``n`` rows (it's called with
+        increasing sizes). ``queries``/``ms`` budgets apply to every size."""
+        runs = []
+        for size in sizes:
+            populate(size)
+            with Budget(queries, ms, label=f'{url} with {size} rows') as measured:
+                response = client.get(url)
+            assert response.status_code == 200
+            runs.append((size, measured))
+
+        counts = {size: len(measured.captured) for size, measured in runs}
+        if len(set(counts.values())) > 1:
+            (small, first), (large, last) = runs[0], runs[-1]
+            pytest.fail(
+                f'{url}: query count grows with the number of rows {counts}\n'
+                f'with {small} rows:\n{format_queries(first.captured)}\n'
+                f'with {large} rows:\n{format_queries(last.captured)}',
+                pytrace=False,
+            )
+        return runs
+
+    return check
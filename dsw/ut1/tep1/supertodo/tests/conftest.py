@@ -1,4 +1,6 @@
 import pytest
+from budgets import assert_constant_queries, budget  # noqa: F401
+from snapshot import django_db_setup, seeded_database, seeded_db, snapshot_dirs  # noqa: F401
 from model_bakery import baker
 
 from tasks.models import Task
@@ -30,6 +32,15 @@ def get_url_and_tasks(completed: bool | None):
     return url, included_tasks, excluded_tasks
 
 
+def populate_tasks(size: int):
+    """Add tasks until there are ``size`` of them."""
+    count = Task.objects.count()
+    if size > count:
+        # Faker slugs collide once there are a few hundred of them
+        slugs = (f'task-{n}' for n in range(count, size))
+        baker.make_recipe('tests.task', _quantity=size - count, _bulk_create=True, slug=slugs)
+
+
 @pytest.fixture
 def task():
     return baker.make_recipe('tests.task')
@@ -0,0 +1,113 @@
+"""Test databases cloned from snapshots instead of migrated per run.
+
+The first process to get here migrates two template databases under the
+pytest temp dir (``templates/``), shared by all xdist workers of the run:
+
+- ``empty.sqlite3``: just migrated.
+- ``seeded.sqlite3``: migrated plus ``SEED_TASKS`` tasks from the
+  ``tests.task`` recipe.
+
+Every worker then copies ``empty`` into its own file with the SQLite backup
+API and runs the regular ``django_db`` tests against it. Read-only tests
+can ask for the ``seeded_db`` fixture instead: the connection is pointed at
+the worker's copy of ``seeded`` (made once per worker) and every test runs
+inside a transaction that is rolled back, so no rows are created at all.
+
+    uv run pytest -n auto
+"""
+
+import contextlib
+import fcntl
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from model_bakery import baker
+
+SEED_TASKS = 50
+
+
+def clone(source: Path, target: Path):
+    """Page-level copy of a SQLite database (consistent even if in use)."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+@contextlib.contextmanager
+def use_database(path: Path):
+    """Point the default connection at another SQLite file for a while."""
+    previous = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = previous
+
+
+def build_templates(root: Path) -> tuple[Path, Path]:
+    empty, seeded = root / 'empty.sqlite3', root / 'seeded.sqlite3'
+    ready = root / 'templates.ready'
+    with open(root / 'templates.lock', 'w') as lock:
+        # Workers start together: one builds, the rest wait and reuse
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not ready.exists():
+            with use_database(empty):
+                call_command('migrate', interactive=False, run_syncdb=True, verbosity=0)
+            clone(empty, seeded)
+            with use_database(seeded), transaction.atomic():
+                slugs = (f'seed-{n}' for n in range(SEED_TASKS))
+                baker.make_recipe('tests.task', _quantity=SEED_TASKS, _bulk_create=True, slug=slugs)
+            ready.touch()
+    return empty, seeded
+
+
+@pytest.fixture(scope='session')
+def snapshot_dirs(tmp_path_factory) -> tuple[Path, Path]:
+    """(run dir shared by all workers, this worker's own dir)."""
+    worker_dir = tmp_path_factory.getbasetemp()
+    # Under xdist every worker has its own basetemp inside the run's one
+    run_dir = worker_dir.parent if 'PYTEST_XDIST_WORKER' in os.environ else worker_dir
+    shared_dir = run_dir / 'templates'
+    shared_dir.mkdir(exist_ok=True)
+    return shared_dir, worker_dir
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_test_environment, django_db_blocker, snapshot_dirs):
+    """Replaces pytest-django's: clone the worker database, don't migrate it."""
+    shared_dir, worker_dir = snapshot_dirs
+    with django_db_blocker.unblock():
+        empty, _ = build_templates(shared_dir)
+        database = worker_dir / 'test.sqlite3'
+        clone(empty, database)
+        connection.close()
+        connection.settings_dict['NAME'] = str(database)
+    yield
+
+
+@pytest.fixture(scope='session')
+def seeded_database(django_db_setup, snapshot_dirs) -> Path:
+    shared_dir, worker_dir = snapshot_dirs
+    database = worker_dir / 'seeded.sqlite3'
+    clone(shared_dir / 'seeded.sqlite3', database)
+    return database
+
+
+@pytest.fixture
+def seeded_db(seeded_database, django_db_blocker):
+    """Database with ``SEED_TASKS`` tasks already there. Don't combine it with
+    ``django_db``: the test gets its own connection state and everything it
+    writes is rolled back."""
+    with django_db_blocker.unblock(), use_database(seeded_database):
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
@@ -0,0 +1,33 @@
+import conftest
+import pytest
+
+# url, max queries, max ms (with 1000 tasks on the page)
+budgets = (
+    (conftest.TASK_LIST_URL, 5, 1000),
+    (conftest.TASK_LIST_COMPLETED_URL, 5, 1000),
+    (conftest.TASK_LIST_PENDING_URL, 5, 1000),
+)
+
+# ==============================================================================
+# QUERY AND TIME BUDGETS
+# ==============================================================================
+
+
+@pytest.mark.parametrize('url, queries, ms', budgets)
+@pytest.mark.django_db
+def test_task_list_queries_do_not_grow_with_tasks(assert_constant_queries, url: str, queries: int, ms: int):
+    assert_constant_queries(url, conftest.populate_tasks, sizes=(10, 1000), queries=queries, ms=ms)
+
+
+@pytest.mark.django_db
+def test_task_detail_within_budget(client, budget, task):
+    with budget(queries=3, ms=200):
+        response = client.get(conftest.TASK_DETAIL_URL.format(task_slug=task.slug))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('url', [url for url, _, _ in budgets])
+def test_task_list_within_budget_on_seeded_db(client, budget, seeded_db, url: str):
+    with budget(queries=5, ms=200, label=url):
+        response = client.get(url)
+    assert response.status_code == 200